@@ -0,0 +1,125 @@
+# answer_table.py
+import argparse
+import csv
+import json
+import os
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+ANSWER_TABLE_FILENAME = 'answer_table.npz'
+
+def read_phrase_log(path):
+    """Phrases logged in production: plain text lines or JSON lines with a 'symptoms' field"""
+    phrases = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('{'):
+                try:
+                    line = json.loads(line).get('symptoms', '')
+                except ValueError:
+                    pass
+            phrases.append(line)
+    return phrases
+
+def build_answer_table(predictor, phrases, output_path=None, top_k=3, batch_size=64):
+    """
+    Precompute top-K DistilBERT predictions for every distinct normalized phrase
+    and store them as compact arrays (label ids + float16 confidences)
+    """
+    output_path = output_path or os.path.join(predictor.model_path, ANSWER_TABLE_FILENAME)
+
+    keys = sorted({predictor.clean_medical_text(phrase) for phrase in phrases} - {''})
+    print(f"📒 Precomputing answers for {len(keys)} normalized phrases...")
+
+    predictions = predictor.predict_batch(keys, top_k=top_k, batch_size=batch_size)
+    label_ids = {label: i for i, label in enumerate(predictor.disease_labels)}
+
+    kept_keys, indices, confidences = [], [], []
+    for key, top in zip(keys, predictions):
+        if len(top) != top_k:
+            continue
+        kept_keys.append(key)
+        indices.append([label_ids[p['condition']] for p in top])
+        confidences.append([p['confidence'] for p in top])
+
+    np.savez_compressed(
+        output_path,
+        keys=np.array(kept_keys),
+        indices=np.array(indices, dtype=np.int16).reshape(-1, top_k),
+        confidences=np.array(confidences, dtype=np.float16).reshape(-1, top_k),
+        labels=np.array(predictor.disease_labels),
+        model_version=np.array(predictor.model_version),
+    )
+    print(f"💾 Answer table saved to {output_path} ({len(kept_keys)} entries)")
+    return output_path
+
+class AnswerTable:
+    """Exact-match lookup of precomputed predictions by normalized text"""
+    def __init__(self, keys, indices, confidences, labels):
+        self._rows = {key: row for row, key in enumerate(keys)}
+        self._indices = indices
+        self._confidences = confidences
+        self._labels = labels
+
+    def __len__(self):
+        return len(self._rows)
+
+    @classmethod
+    def load(cls, model_path, model_version):
+        """Load the table, or return None when missing or built for different weights"""
+        path = os.path.join(model_path, ANSWER_TABLE_FILENAME)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with np.load(path) as data:
+                if str(data['model_version']) != model_version:
+                    print(f"⚠️ Answer table was built for model {data['model_version']}, "
+                          f"not {model_version} - ignoring it (rebuild with: python answer_table.py)")
+                    return None
+                return cls(
+                    [str(key) for key in data['keys']],
+                    data['indices'].astype(np.int64),
+                    data['confidences'].astype(np.float64),
+                    [str(label) for label in data['labels']],
+                )
+        except Exception as e:
+            print(f"⚠️ Could not load answer table: {e}")
+            return None
+
+    def lookup(self, cleaned_text) -> Optional[List[Dict[str, Any]]]:
+        """Top-K predictions (without emergency flags) or None on a miss"""
+        row = self._rows.get(cleaned_text)
+        if row is None:
+            return None
+        return [
+            {'condition': self._labels[index], 'confidence': float(confidence)}
+            for index, confidence in zip(self._indices[row], self._confidences[row])
+        ]
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute ai_recommend answers for known symptom phrasings')
+    parser.add_argument('--csv', default='medical_training_data.csv')
+    parser.add_argument('--phrase-log', action='append', default=[],
+                        help='Production phrase log to include (repeatable; see MEDIQUEUE_PHRASE_LOG)')
+    parser.add_argument('--model-path', default='./medical_ai_model_enhanced')
+    args = parser.parse_args()
+
+    from model_predictor_enhanced import MedicalAIPredictor
+
+    with open(args.csv, newline='', encoding='utf-8') as f:
+        phrases = [row['symptoms'] for row in csv.DictReader(f)]
+    for path in args.phrase_log:
+        phrases.extend(read_phrase_log(path))
+
+    # Always build from the reference PyTorch weights with no cache, cascade or early exit
+    predictor = MedicalAIPredictor(args.model_path, cache_size=0, backend='torch', cascade_threshold=2.0,
+                                   early_exit_threshold=2.0)
+    build_answer_table(predictor, phrases)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# batch_score.py
+"""
+Re-score a large file of symptom texts with the DistilBERT model.
+
+Reads JSONL (one object per line with a "symptoms" field) or CSV (a
+"symptoms" column) as a stream, scores batches on several worker processes
+and appends one JSON line per input row to the output, in input order. If
+the run stops, the same command with --resume skips the rows already written.
+
+    python batch_score.py export.csv scores.jsonl --workers 4
+    python batch_score.py export.csv scores.jsonl --workers 4 --resume
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from typing import Dict, Any, Iterator, List, Tuple
+
+_worker_predictor = None
+
+def read_records(path, text_field='symptoms', id_field=None, input_format=None) -> Iterator[Tuple[Any, str]]:
+    """(id, text) per input row; the id is id_field's value or the 0-based row number"""
+    input_format = input_format or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+    with open(path, newline='', encoding='utf-8') as f:
+        if input_format == 'csv':
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for row_number, row in enumerate(rows):
+            yield (row.get(id_field) if id_field else row_number), str(row.get(text_field) or '')
+
+def _batches(records, batch_size, skip=0) -> Iterator[List[Tuple[Any, str]]]:
+    batch = []
+    for row_number, record in enumerate(records):
+        if row_number < skip:
+            continue
+        batch.append(record)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def completed_rows(output_path) -> int:
+    """
+    Rows already in the output, dropping a half-written last line left by
+    an interrupted run
+    """
+    if not os.path.exists(output_path):
+        return 0
+
+    with open(output_path, 'rb+') as f:
+        data = f.read()
+        complete = data.rfind(b'\n') + 1
+        if complete < len(data):
+            f.truncate(complete)
+    return data[:complete].count(b'\n')
+
+def _init_worker(model_path, backend, threads):
+    """Load one predictor per worker process"""
+    global _worker_predictor
+    import torch
+    from model_predictor_enhanced import MedicalAIPredictor
+
+    torch.set_num_threads(threads)
+    # Scores come straight from the transformer: no cache, cheap-classifier cascade or early exit
+    _worker_predictor = MedicalAIPredictor(model_path, cache_size=0, backend=backend,
+                                           cascade_threshold=2.0, early_exit_threshold=2.0)
+
+def _score_batch(batch, top_k) -> List[Dict[str, Any]]:
+    predictions = _worker_predictor.predict_batch([text for _, text in batch], top_k=top_k, batch_size=len(batch))
+    return [
+        {'id': record_id, 'symptoms': text, 'predictions': top,
+         'model_version': _worker_predictor.model_version, 'error': None if top else 'prediction failed'}
+        for (record_id, text), top in zip(batch, predictions)
+    ]
+
+def score_file(input_path, output_path, model_path, workers=1, batch_size=64, top_k=3, backend='torch',
+               text_field='symptoms', id_field=None, input_format=None, resume=False):
+    """Stream input_path through the model into output_path (JSON lines); returns rows written"""
+    done = completed_rows(output_path) if resume else 0
+    if done:
+        print(f"⏩ Resuming after {done} rows already in {output_path}")
+    elif os.path.exists(output_path) and not resume:
+        raise FileExistsError(f"{output_path} exists - pass --resume to continue it")
+
+    workers = max(1, workers)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    batches = _batches(read_records(input_path, text_field, id_field, input_format), batch_size, skip=done)
+
+    written = 0
+    started = time.perf_counter()
+    with open(output_path, 'a', encoding='utf-8') as out:
+        def write(results):
+            nonlocal written
+            out.write(''.join(json.dumps(result, ensure_ascii=False) + '\n' for result in results))
+            out.flush()
+            written += len(results)
+            if written % (batch_size * 20) < len(results):
+                rate = written / max(time.perf_counter() - started, 1e-9)
+                print(f"📝 {done + written} rows scored ({rate:.0f} rows/s)")
+
+        if workers == 1:
+            _init_worker(model_path, backend, threads)
+            for batch in batches:
+                write(_score_batch(batch, top_k))
+        else:
+            # A bounded window of batches in flight keeps memory flat and output in input order
+            context = multiprocessing.get_context('spawn')
+            with context.Pool(workers, initializer=_init_worker, initargs=(model_path, backend, threads)) as pool:
+                pending = deque()
+                for batch in batches:
+                    pending.append(pool.apply_async(_score_batch, (batch, top_k)))
+                    if len(pending) >= workers * 2:
+                        write(pending.popleft().get())
+                while pending:
+                    write(pending.popleft().get())
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Scored {written} rows in {elapsed:.1f}s ({written / max(elapsed, 1e-9):.0f} rows/s) -> {output_path}")
+    return written
+
+def main():
+    from model_predictor_enhanced import MODEL_PATH, AI_BACKEND
+
+    parser = argparse.ArgumentParser(description='Batch-score a JSONL or CSV file of symptom texts')
+    parser.add_argument('input', help='.jsonl or .csv file with a symptoms field')
+    parser.add_argument('output', help='JSON lines output, one result per input row')
+    parser.add_argument('--model-path', default=MODEL_PATH)
+    parser.add_argument('--backend', default=AI_BACKEND, choices=['torch', 'onnx', 'int8', 'torchscript'])
+    parser.add_argument('--workers', type=int, default=1, help='Scoring processes (each loads the model)')
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--top-k', type=int, default=3)
+    parser.add_argument('--format', choices=['jsonl', 'csv'], default=None, help='Input format (default: by extension)')
+    parser.add_argument('--text-field', default='symptoms')
+    parser.add_argument('--id-field', default=None, help='Field copied to "id" in the output (default: row number)')
+    parser.add_argument('--resume', action='store_true', help='Continue an interrupted run into the same output')
+    args = parser.parse_args()
+
+    score_file(args.input, args.output, args.model_path, workers=args.workers, batch_size=args.batch_size,
+               top_k=args.top_k, backend=args.backend, text_field=args.text_field, id_field=args.id_field,
+               input_format=args.format, resume=args.resume)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+# benchmark_inference.py
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import queue
+import random
+import resource
+import subprocess
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import torch
+from transformers import DistilBertTokenizer, DistilBertTokenizerFast
+
+from model_export import DEFAULT_MODEL_PATH, DEFAULT_CSV_PATH, load_labeled_texts
+
+def _timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+def _batched_forward(predictor, texts, batch_size, max_length, bucket):
+    """Run the model over texts in chunks; returns (seconds, padded token positions)"""
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i])) if bucket else list(range(len(texts)))
+    padded_positions = 0
+    started = time.perf_counter()
+
+    for start in range(0, len(order), batch_size):
+        chunk = [texts[i] for i in order[start:start + batch_size]]
+        inputs = predictor.tokenizer(chunk, truncation=True, padding=True, max_length=max_length, return_tensors='pt')
+        padded_positions += inputs['input_ids'].numel()
+        with torch.no_grad():
+            predictor._forward(inputs)
+
+    return time.perf_counter() - started, padded_positions
+
+def benchmark_tokenization(model_path=DEFAULT_MODEL_PATH, csv_path=DEFAULT_CSV_PATH, limit=None, batch_size=32):
+    """
+    Compare the pure-Python and Rust tokenizers, and fixed max_length=256
+    batches against length-bucketed batches with the derived serving length
+    """
+    from model_predictor_enhanced import MedicalAIPredictor, TRAINING_MAX_LENGTH
+
+    predictor = MedicalAIPredictor(model_path, cache_size=0)
+    texts, _ = load_labeled_texts(csv_path, limit)
+    texts = [predictor.clean_medical_text(text) for text in texts]
+    print(f"📊 Tokenization benchmark on {len(texts)} texts (serving max_length {predictor.max_length})")
+
+    # One text at a time, the way /recommend tokenizes
+    slow_tokenizer = DistilBertTokenizer.from_pretrained(model_path)
+    fast_tokenizer = DistilBertTokenizerFast.from_pretrained(model_path)
+    _, slow_seconds = _timed(lambda: [slow_tokenizer(text, truncation=True, max_length=TRAINING_MAX_LENGTH) for text in texts])
+    _, fast_seconds = _timed(lambda: [fast_tokenizer(text, truncation=True, max_length=predictor.max_length) for text in texts])
+
+    real_tokens = sum(len(ids) for ids in fast_tokenizer(texts)['input_ids'])
+    base_seconds, base_positions = _batched_forward(predictor, texts, batch_size, TRAINING_MAX_LENGTH, bucket=False)
+    tuned_seconds, tuned_positions = _batched_forward(predictor, texts, batch_size, predictor.max_length, bucket=True)
+
+    print(f"\n{'step':<34} {'baseline':>12} {'optimized':>12} {'speedup':>8}")
+    print(f"{'tokenize, per text (us)':<34} {slow_seconds / len(texts) * 1e6:>12.1f} {fast_seconds / len(texts) * 1e6:>12.1f} "
+          f"{slow_seconds / fast_seconds:>7.1f}x")
+    print(f"{'forward pass, corpus (s)':<34} {base_seconds:>12.2f} {tuned_seconds:>12.2f} {base_seconds / tuned_seconds:>7.1f}x")
+    print(f"{'padding waste (% of positions)':<34} {100 * (1 - real_tokens / base_positions):>12.1f} "
+          f"{100 * (1 - real_tokens / tuned_positions):>12.1f}")
+    print(f"(baseline: {'slow' if not slow_tokenizer.is_fast else 'fast'} tokenizer, max_length {TRAINING_MAX_LENGTH}, "
+          f"CSV order; optimized: fast tokenizer, max_length {predictor.max_length}, length buckets of {batch_size})")
+
+    return {
+        'tokenize_slow_seconds': slow_seconds,
+        'tokenize_fast_seconds': fast_seconds,
+        'forward_baseline_seconds': base_seconds,
+        'forward_bucketed_seconds': tuned_seconds,
+        'padded_positions_baseline': base_positions,
+        'padded_positions_bucketed': tuned_positions,
+        'real_tokens': real_tokens,
+    }
+
+def _scan_keywords(keywords, symptoms):
+    """The original fallback_recommendation loops, kept as the baseline"""
+    symptoms_lower = symptoms.lower()
+    symptom_mapping = dict(keywords)
+
+    for symptom, specialty in symptom_mapping.items():
+        if symptom in symptoms_lower:
+            return specialty
+
+    for word in symptoms_lower.split():
+        for symptom, specialty in symptom_mapping.items():
+            if word in symptom and len(word) > 4:
+                return specialty
+
+    return None
+
+def benchmark_fallback(csv_path=DEFAULT_CSV_PATH, rules_path='symptom_rules.json', limit=None, repeat=5):
+    """
+    Compare the compiled keyword matcher with the original per-request scan
+    over the CSV symptoms, checking that both pick the same specialty
+    """
+    from symptom_matcher import KeywordMatcher, SymptomRules
+
+    keywords = SymptomRules.load(rules_path).fallback_keywords
+    texts, _ = load_labeled_texts(csv_path, limit)
+    matcher, compile_seconds = _timed(lambda: KeywordMatcher(keywords))
+    print(f"📊 Fallback matcher benchmark on {len(texts)} texts x {repeat} "
+          f"({len(keywords)} keywords, compiled in {compile_seconds * 1000:.1f} ms)")
+
+    mismatches = [text for text in texts if _scan_keywords(keywords, text) != matcher.match(text)]
+    if mismatches:
+        print(f"❌ {len(mismatches)} texts matched differently, e.g. {mismatches[0]!r}")
+
+    _, scan_seconds = _timed(lambda: [_scan_keywords(keywords, text) for _ in range(repeat) for text in texts])
+    _, matcher_seconds = _timed(lambda: [matcher.match(text) for _ in range(repeat) for text in texts])
+
+    calls = len(texts) * repeat
+    print(f"\n{'implementation':<20} {'per text (us)':>14}")
+    print(f"{'scan (original)':<20} {scan_seconds / calls * 1e6:>14.1f}")
+    print(f"{'compiled matcher':<20} {matcher_seconds / calls * 1e6:>14.1f}")
+    print(f"Speedup: {scan_seconds / matcher_seconds:.1f}x, identical results: {not mismatches}")
+
+    return {
+        'scan_seconds': scan_seconds,
+        'matcher_seconds': matcher_seconds,
+        'calls': calls,
+        'mismatches': len(mismatches),
+    }
+
+def _memory_usage_mb():
+    """RSS, PSS (shared pages split between their users) and private memory of this process"""
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if key in ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty'):
+                values[key] = int(rest.split()[0]) / 1024
+    return {
+        'rss_mb': values['Rss'],
+        'pss_mb': values['Pss'],
+        'private_mb': values['Private_Clean'] + values['Private_Dirty'],
+    }
+
+def _memory_worker(get_predictor, texts, barrier, results):
+    predictor = get_predictor()
+    predictor.predict_batch(texts)
+    # Measure only once every worker holds its model, so PSS reflects the sharing
+    barrier.wait()
+    results.put(_memory_usage_mb())
+    barrier.wait()
+
+def _measure_workers(get_predictor, texts, workers):
+    """Fork workers that each classify texts; returns per-worker memory and the master's"""
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(workers + 1)
+    results = context.Queue()
+    processes = [context.Process(target=_memory_worker, args=(get_predictor, texts, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+
+    barrier.wait()
+    master = _memory_usage_mb()
+    per_worker = [results.get() for _ in processes]
+    barrier.wait()
+    for process in processes:
+        process.join()
+    return per_worker, master
+
+def benchmark_memory(model_path=DEFAULT_MODEL_PATH, csv_path=DEFAULT_CSV_PATH, workers=4, limit=64):
+    """
+    Per-worker memory with the model loaded in every worker vs preloaded in
+    the master and forked, each with heap-copied and memory-mapped weights
+    (Linux only: reads /proc/self/smaps_rollup)
+    """
+    import model_predictor_enhanced
+    from model_predictor_enhanced import MedicalAIPredictor
+
+    texts, _ = load_labeled_texts(csv_path, limit)
+    print(f"📊 Memory benchmark: {workers} forked workers, model {model_path}")
+
+    setups = []
+    for mmap_weights in (False, True):
+        setups.append((f"per-worker, {'mmap' if mmap_weights else 'heap'}", mmap_weights, False))
+    for mmap_weights in (False, True):
+        setups.append((f"preload, {'mmap' if mmap_weights else 'heap'}", mmap_weights, True))
+
+    report = {}
+    for name, mmap_weights, preload in setups:
+        kwargs = dict(cache_size=0, mmap_weights=mmap_weights)
+        if preload:
+            predictor = model_predictor_enhanced.preload_model(model_path, **kwargs)
+            get_predictor = lambda: predictor
+        else:
+            get_predictor = lambda: MedicalAIPredictor(model_path, **kwargs)
+
+        per_worker, master = _measure_workers(get_predictor, texts, workers)
+        report[name] = {
+            'rss_mb': sum(m['rss_mb'] for m in per_worker) / workers,
+            'pss_mb': sum(m['pss_mb'] for m in per_worker) / workers,
+            'private_mb': sum(m['private_mb'] for m in per_worker) / workers,
+            'total_pss_mb': sum(m['pss_mb'] for m in per_worker) + master['pss_mb'],
+        }
+        predictor = None
+        model_predictor_enhanced._preloaded_predictor = None
+
+    print(f"\n{'setup':<20} {'RSS/worker':>11} {'PSS/worker':>11} {'private/worker':>15} {'total PSS':>10}")
+    for name, row in report.items():
+        print(f"{name:<20} {row['rss_mb']:>11.0f} {row['pss_mb']:>11.0f} {row['private_mb']:>15.0f} {row['total_pss_mb']:>10.0f}")
+    print("(MB; total PSS includes the master process)")
+    return report
+
+def _peak_rss_mb():
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _latency_row(config, mode, batch_size, concurrency, latencies_ms, items, seconds):
+    return {
+        'config': config,
+        'mode': mode,
+        'batch_size': batch_size,
+        'concurrency': concurrency,
+        'calls': len(latencies_ms),
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p95_ms': float(np.percentile(latencies_ms, 95)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+        'items_per_second': items / seconds,
+        'peak_rss_mb': _peak_rss_mb(),
+    }
+
+def _concurrent_requests(batcher, texts, concurrency):
+    """`concurrency` clients sending texts through the micro-batcher back to back"""
+    pending = iter(texts)
+    pending_lock = threading.Lock()
+    latencies = []
+
+    def client():
+        while True:
+            with pending_lock:
+                text = next(pending, None)
+            if text is None:
+                return
+            started = time.perf_counter()
+            batcher.submit(text).result()
+            latencies.append((time.perf_counter() - started) * 1000.0)
+
+    clients = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    return latencies, time.perf_counter() - started
+
+def _latency_worker(model_path, backend, early_exit_threshold, texts, settings, results):
+    """One configuration in a fresh process, so its peak RSS is its own"""
+    try:
+        from model_predictor_enhanced import MedicalAIPredictor, MicroBatcher, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS
+
+        if settings['threads']:
+            torch.set_num_threads(settings['threads'])
+        # Measure the transformer itself: no cache, cheap-classifier cascade or answer table
+        predictor = MedicalAIPredictor(model_path, cache_size=0, backend=backend, cascade_threshold=2.0,
+                                       early_exit_threshold=early_exit_threshold)
+        predictor.answer_table = None
+        if predictor.backend != backend:
+            results.put({'skipped': f"{backend} artifacts missing (loaded {predictor.backend})"})
+            return
+        predictor.warm_up()
+
+        config = backend + (f"+early-exit@{early_exit_threshold:g}" if early_exit_threshold <= 1 else '')
+        rows = []
+        for batch_size in settings['batch_sizes']:
+            latencies = []
+            started = time.perf_counter()
+            for _ in range(settings['rounds']):
+                for start in range(0, len(texts), batch_size):
+                    call_started = time.perf_counter()
+                    predictor._predict_texts(texts[start:start + batch_size])
+                    latencies.append((time.perf_counter() - call_started) * 1000.0)
+            rows.append(_latency_row(config, 'batch', batch_size, 1, latencies,
+                                     len(texts) * settings['rounds'], time.perf_counter() - started))
+
+        # The serving path: concurrent single-text requests coalesced by the micro-batcher
+        batcher = MicroBatcher(predictor, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS)
+        for concurrency in settings['concurrency']:
+            # Keep the per-request recommendation logging out of the report
+            with contextlib.redirect_stdout(io.StringIO()):
+                latencies, seconds = _concurrent_requests(batcher, texts, concurrency)
+            rows.append(_latency_row(config, 'concurrent', BATCH_MAX_SIZE, concurrency, latencies, len(texts), seconds))
+        results.put({'rows': rows})
+    except Exception as e:
+        results.put({'error': str(e)})
+
+def _git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True, text=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _row_key(row):
+    return row['config'], row['mode'], row['batch_size'], row['concurrency']
+
+def compare_latency_reports(baseline_path, report):
+    """Print p95 and throughput changes against an earlier JSON report"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {_row_key(row): row for row in baseline['results']}
+
+    print(f"\nvs {baseline_path} (commit {baseline.get('commit')})")
+    print(f"{'config':<24} {'mode':<11} {'batch':>5} {'conc':>5} {'p95 ms':>16} {'items/s':>18}")
+    for row in report['results']:
+        old = previous.get(_row_key(row))
+        if old is None:
+            continue
+        p95_change = 100 * (row['p95_ms'] / old['p95_ms'] - 1)
+        rate_change = 100 * (row['items_per_second'] / old['items_per_second'] - 1)
+        print(f"{row['config']:<24} {row['mode']:<11} {row['batch_size']:>5} {row['concurrency']:>5} "
+              f"{row['p95_ms']:>8.2f} ({p95_change:+5.1f}%) {row['items_per_second']:>9.0f} ({rate_change:+5.1f}%)")
+
+def benchmark_latency(model_path=DEFAULT_MODEL_PATH, csv_path=DEFAULT_CSV_PATH, backends=('torch',),
+                      batch_sizes=(1, 8, 32), concurrency=(1, 4, 16), samples=256, rounds=3, seed=0,
+                      early_exit_threshold=2.0, threads=None, output_path='benchmark_latency.json', baseline_path=None):
+    """
+    p50/p95/p99 latency, items/sec and peak RSS per backend: batched calls at
+    several batch sizes, then concurrent requests through the micro-batcher.
+    Texts are a seeded sample of the CSV; results are saved as JSON
+    """
+    all_texts, _ = load_labeled_texts(csv_path)
+    texts = random.Random(seed).sample(all_texts, min(samples, len(all_texts)))
+    settings = {
+        'model_path': model_path,
+        'samples': len(texts),
+        'seed': seed,
+        'rounds': rounds,
+        'batch_sizes': list(batch_sizes),
+        'concurrency': list(concurrency),
+        'threads': threads,
+    }
+    print(f"📊 Latency benchmark: {len(texts)} sampled texts, backends {', '.join(backends)}, "
+          f"batch sizes {settings['batch_sizes']}, concurrency {settings['concurrency']}")
+
+    context = multiprocessing.get_context('spawn')
+    rows = []
+    for backend in backends:
+        results = context.Queue()
+        process = context.Process(target=_latency_worker,
+                                  args=(model_path, backend, early_exit_threshold, texts, settings, results))
+        process.start()
+        while True:
+            try:
+                outcome = results.get(timeout=1)
+                break
+            except queue.Empty:
+                if not process.is_alive():
+                    outcome = {'error': f"worker exited with code {process.exitcode}"}
+                    break
+        process.join()
+        if 'rows' in outcome:
+            rows.extend(outcome['rows'])
+        else:
+            print(f"⚠️ {backend}: {outcome.get('skipped') or outcome.get('error')}")
+
+    report = {
+        'benchmark': 'latency',
+        'commit': _git_commit(),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'machine': {'cpus': os.cpu_count(), 'torch': torch.__version__, 'torch_threads': threads or torch.get_num_threads()},
+        'settings': settings,
+        'results': rows,
+    }
+
+    print(f"\n{'config':<24} {'mode':<11} {'batch':>5} {'conc':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'items/s':>9} {'peak RSS':>9}")
+    for row in rows:
+        print(f"{row['config']:<24} {row['mode']:<11} {row['batch_size']:>5} {row['concurrency']:>5} {row['p50_ms']:>8.2f} "
+              f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['items_per_second']:>9.0f} {row['peak_rss_mb']:>9.0f}")
+    print("(batch: one call per batch of texts; concurrent: per request via the micro-batcher; RSS in MB)")
+
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Results saved to {output_path}")
+    if baseline_path:
+        compare_latency_reports(baseline_path, report)
+    return report
+
+def _int_list(value):
+    return [int(item) for item in value.split(',') if item]
+
+def main():
+    parser = argparse.ArgumentParser(description='MediQueue+ AI inference benchmarks')
+    parser.add_argument('benchmark', choices=['tokenization', 'fallback', 'memory', 'latency'])
+    parser.add_argument('--model-path', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--csv', default=DEFAULT_CSV_PATH)
+    parser.add_argument('--rules', default='symptom_rules.json', help='Rules file for the fallback benchmark')
+    parser.add_argument('--limit', type=int, default=None, help='Only use the first N CSV rows')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=4, help='Forked workers for the memory benchmark')
+    parser.add_argument('--backends', default='torch', help='Comma-separated backends for the latency benchmark')
+    parser.add_argument('--batch-sizes', type=_int_list, default=[1, 8, 32])
+    parser.add_argument('--concurrency', type=_int_list, default=[1, 4, 16])
+    parser.add_argument('--samples', type=int, default=256, help='CSV texts sampled for the latency benchmark')
+    parser.add_argument('--rounds', type=int, default=3, help='Passes over the sample per batch size')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--early-exit', type=float, default=2.0, help='Early-exit threshold (above 1 disables it)')
+    parser.add_argument('--threads', type=int, default=None, help='torch threads per configuration')
+    parser.add_argument('--output', default='benchmark_latency.json', help='JSON results file')
+    parser.add_argument('--baseline', default=None, help='Earlier JSON results to compare against')
+    args = parser.parse_args()
+
+    if args.benchmark == 'tokenization':
+        benchmark_tokenization(args.model_path, args.csv, args.limit, args.batch_size)
+    elif args.benchmark == 'fallback':
+        benchmark_fallback(args.csv, args.rules, args.limit)
+    elif args.benchmark == 'memory':
+        benchmark_memory(args.model_path, args.csv, args.workers, args.limit or 64)
+    elif args.benchmark == 'latency':
+        benchmark_latency(args.model_path, args.csv, args.backends.split(','), args.batch_sizes, args.concurrency,
+                          args.samples, args.rounds, args.seed, args.early_exit, args.threads, args.output, args.baseline)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# cheap_classifier.py
+import os
+from typing import Dict, Any, List
+
+CHEAP_CLASSIFIER_FILENAME = 'cheap_classifier.joblib'
+
+def train_cheap_classifier(train_texts, train_labels, val_texts=None, val_labels=None, output_dir='./medical_ai_model_enhanced'):
+    """
+    Train the first-stage TF-IDF (word + char n-gram) logistic regression on
+    cleaned symptom texts and disease names, and save it next to the model
+    """
+    import joblib
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline, make_union
+
+    print("⚡ Training first-stage TF-IDF classifier...")
+    pipeline = make_pipeline(
+        make_union(
+            TfidfVectorizer(analyzer='word', ngram_range=(1, 2), sublinear_tf=True),
+            TfidfVectorizer(analyzer='char_wb', ngram_range=(2, 5), sublinear_tf=True, min_df=2),
+        ),
+        LogisticRegression(max_iter=2000, C=10.0),
+    )
+    pipeline.fit(list(train_texts), list(train_labels))
+
+    if val_texts is not None and val_labels is not None:
+        accuracy = pipeline.score(list(val_texts), list(val_labels))
+        print(f"📊 First-stage validation accuracy: {accuracy:.3f}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, CHEAP_CLASSIFIER_FILENAME)
+    joblib.dump(pipeline, output_path)
+    print(f"💾 First-stage classifier saved to {output_path}")
+    return pipeline
+
+class CheapClassifier:
+    """Serving wrapper around the saved TF-IDF pipeline"""
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.labels = list(pipeline.classes_)
+
+    @classmethod
+    def load(cls, model_path):
+        """Load the saved pipeline, or return None when it is missing or sklearn isn't installed"""
+        path = os.path.join(model_path, CHEAP_CLASSIFIER_FILENAME)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            import joblib
+            return cls(joblib.load(path))
+        except Exception as e:
+            print(f"⚠️ Could not load first-stage classifier: {e}")
+            return None
+
+    def predict(self, cleaned_texts: List[str], top_k=3) -> List[List[Dict[str, Any]]]:
+        """Top-K (condition, confidence) lists for already-cleaned texts"""
+        probabilities = self.pipeline.predict_proba(list(cleaned_texts))
+
+        results = []
+        for row in probabilities:
+            top_indices = row.argsort()[::-1][:top_k]
+            results.append([
+                {'condition': self.labels[i], 'confidence': float(row[i])}
+                for i in top_indices
+            ])
+        return results
@@ -0,0 +1,161 @@
+# distillation.py
+import copy
+import json
+import os
+import time
+
+import numpy as np
+import torch
+from transformers import DistilBertForSequenceClassification, Trainer
+
+from label_manifest import LabelManifest
+
+def build_student(teacher, num_layers=2):
+    """
+    Shallower copy of the teacher: same embeddings and heads, with
+    transformer layers taken evenly from the teacher's stack
+    """
+    config = copy.deepcopy(teacher.config)
+    teacher_layers = config.n_layers
+    config.n_layers = num_layers
+    student = DistilBertForSequenceClassification(config)
+
+    student.distilbert.embeddings.load_state_dict(teacher.distilbert.embeddings.state_dict())
+    kept = [int(i) for i in np.linspace(0, teacher_layers - 1, num_layers).round()]
+    for student_index, teacher_index in enumerate(kept):
+        student.distilbert.transformer.layer[student_index].load_state_dict(
+            teacher.distilbert.transformer.layer[teacher_index].state_dict()
+        )
+    student.pre_classifier.load_state_dict(teacher.pre_classifier.state_dict())
+    student.classifier.load_state_dict(teacher.classifier.state_dict())
+
+    print(f"🎓 Student initialised with {num_layers} layers (teacher layers {kept})")
+    return student
+
+class DistillationTrainer(Trainer):
+    """Trainer whose loss mixes soft teacher targets with the hard labels"""
+    def __init__(self, *args, teacher=None, temperature=2.0, alpha=0.7, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.teacher = teacher
+        self.teacher.eval()
+        self.temperature = temperature
+        self.alpha = alpha
+
+    def compute_loss(self, model, inputs, return_outputs=False, num_items_in_batch=None):
+        outputs = model(**inputs)
+        student_logits = outputs.logits
+
+        with torch.no_grad():
+            self.teacher.to(student_logits.device)
+            teacher_logits = self.teacher(
+                input_ids=inputs['input_ids'], attention_mask=inputs['attention_mask']
+            ).logits
+
+        soft_loss = torch.nn.functional.kl_div(
+            torch.nn.functional.log_softmax(student_logits / self.temperature, dim=-1),
+            torch.nn.functional.softmax(teacher_logits / self.temperature, dim=-1),
+            reduction='batchmean',
+        ) * (self.temperature ** 2)
+        hard_loss = torch.nn.functional.cross_entropy(student_logits, inputs['labels'])
+
+        loss = self.alpha * soft_loss + (1 - self.alpha) * hard_loss
+        return (loss, outputs) if return_outputs else loss
+
+def _model_size_mb(model):
+    return sum(p.numel() * p.element_size() for p in model.parameters()) / (1024 * 1024)
+
+def _per_item_latency_ms(model, tokenizer, texts, max_length=256):
+    latencies = []
+    with torch.no_grad():
+        for text in texts:
+            inputs = tokenizer(text, truncation=True, padding=True, max_length=max_length, return_tensors='pt')
+            started = time.perf_counter()
+            model(**inputs)
+            latencies.append((time.perf_counter() - started) * 1000.0)
+    return float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95))
+
+def compare_student_to_teacher(teacher, student, tokenizer, texts, labels, latency_samples=200, batch_size=64):
+    """Accuracy, top-1 agreement, latency and parameter memory of student vs teacher"""
+    teacher.eval()
+    student.eval()
+    teacher.to('cpu')
+    student.to('cpu')
+
+    predictions = {'teacher': [], 'student': []}
+    with torch.no_grad():
+        for start in range(0, len(texts), batch_size):
+            inputs = tokenizer(list(texts[start:start + batch_size]), truncation=True, padding=True,
+                               max_length=256, return_tensors='pt')
+            predictions['teacher'].extend(teacher(**inputs).logits.argmax(dim=-1).tolist())
+            predictions['student'].extend(student(**inputs).logits.argmax(dim=-1).tolist())
+
+    report = {}
+    for name, model in (('teacher', teacher), ('student', student)):
+        p50, p95 = _per_item_latency_ms(model, tokenizer, list(texts[:latency_samples]))
+        report[name] = {
+            'layers': model.config.n_layers,
+            'parameters_mb': _model_size_mb(model),
+            'accuracy': float(np.mean(np.array(predictions[name]) == np.array(labels))),
+            'latency_p50_ms': p50,
+            'latency_p95_ms': p95,
+        }
+    report['student']['agreement_with_teacher'] = float(
+        np.mean(np.array(predictions['student']) == np.array(predictions['teacher']))
+    )
+
+    print(f"\n{'model':<8} {'layers':>6} {'params MB':>10} {'accuracy':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for name in ('teacher', 'student'):
+        row = report[name]
+        print(f"{name:<8} {row['layers']:>6} {row['parameters_mb']:>10.1f} {row['accuracy']:>9.3f} "
+              f"{row['latency_p50_ms']:>8.2f} {row['latency_p95_ms']:>8.2f}")
+    print(f"Student/teacher top-1 agreement: {report['student']['agreement_with_teacher']:.3f}")
+    return report
+
+def distill_student(teacher_path, student_path, tokenizer, train_dataset, val_dataset, id_to_label,
+                    training_args, compute_metrics=None, num_layers=2, temperature=2.0, alpha=0.7):
+    """
+    Train a shallow student against the fine-tuned teacher, save it as a
+    regular DistilBERT classifier MedicalAIPredictor can serve, and report
+    how it compares
+    """
+    print(f"🧑‍🏫 Loading teacher from {teacher_path}...")
+    teacher = DistilBertForSequenceClassification.from_pretrained(teacher_path)
+
+    # This run numbers labels in sorted-name order; map by name to the
+    # teacher's ids, which differ when it saw other labels or predates sorting
+    remap = {script_id: teacher.config.label2id[name] for script_id, name in id_to_label.items()}
+    train_dataset = train_dataset.map(lambda example: {'labels': remap[example['labels']]})
+    val_dataset = val_dataset.map(lambda example: {'labels': remap[example['labels']]})
+
+    student = build_student(teacher, num_layers)
+    trainer = DistillationTrainer(
+        model=student,
+        args=training_args,
+        train_dataset=train_dataset,
+        eval_dataset=val_dataset,
+        compute_metrics=compute_metrics,
+        teacher=teacher,
+        temperature=temperature,
+        alpha=alpha,
+    )
+
+    print("🚀 Starting distillation...")
+    trainer.train()
+
+    print(f"💾 Saving student model to {student_path}...")
+    trainer.save_model(student_path)
+    tokenizer.save_pretrained(student_path)
+
+    # Same labels and tokenizer as the teacher
+    manifest = LabelManifest.load(teacher_path)
+    if manifest is not None:
+        manifest.save(student_path)
+
+    report = compare_student_to_teacher(
+        teacher, trainer.model, tokenizer, val_dataset['text'], val_dataset['labels']
+    )
+    with open(os.path.join(student_path, 'distillation_report.json'), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"✅ Student saved - serve it with MEDIQUEUE_MODEL_PATH={student_path}")
+    return trainer.model, report
@@ -0,0 +1,153 @@
+# early_exit.py
+import os
+import torch
+
+EXIT_HEADS_FILENAME = 'exit_heads.pt'
+
+class ExitHeads(torch.nn.Module):
+    """One linear classifier on the [CLS] state after each transformer layer except the last"""
+    def __init__(self, dim, num_labels, num_exits):
+        super().__init__()
+        self.heads = torch.nn.ModuleList([torch.nn.Linear(dim, num_labels) for _ in range(num_exits)])
+
+    @classmethod
+    def load(cls, model_path, model, device):
+        """Load the trained heads, or return None when missing or built for another model shape"""
+        path = os.path.join(model_path, EXIT_HEADS_FILENAME)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            saved = torch.load(path, map_location='cpu')
+            config = model.config
+            if (saved['dim'], saved['num_labels'], saved['num_exits']) != (config.dim, config.num_labels, config.n_layers - 1):
+                print(f"⚠️ {path} does not match the model shape - early exit disabled")
+                return None
+            heads = cls(saved['dim'], saved['num_labels'], saved['num_exits'])
+            heads.load_state_dict(saved['state_dict'])
+            heads.to(device)
+            heads.eval()
+            return heads
+        except Exception as e:
+            print(f"⚠️ Could not load early-exit heads: {e}")
+            return None
+
+def _attention_mask(model, embeddings, attention_mask):
+    """The mask format the transformer layers expect for this transformers version"""
+    try:
+        from transformers.masking_utils import create_bidirectional_mask
+    except ImportError:
+        return attention_mask
+    return create_bidirectional_mask(config=model.config, inputs_embeds=embeddings, attention_mask=attention_mask)
+
+def _run_layer(layer, hidden_states, attention_mask):
+    output = layer(hidden_states, attention_mask)
+    return output[0] if isinstance(output, tuple) else output
+
+def _final_logits(model, cls_state):
+    pooled = torch.nn.functional.relu(model.pre_classifier(cls_state))
+    return model.classifier(model.dropout(pooled))
+
+def _cls_features(model, dataset, batch_size=64):
+    """[CLS] state after every layer but the last, for a tokenized dataset"""
+    model.eval()
+    loader = torch.utils.data.DataLoader(
+        dataset.with_format('torch', columns=['input_ids', 'attention_mask', 'labels']), batch_size=batch_size
+    )
+    device = next(model.parameters()).device
+
+    features, labels = [], []
+    with torch.no_grad():
+        for batch in loader:
+            outputs = model.distilbert(
+                input_ids=batch['input_ids'].to(device),
+                attention_mask=batch['attention_mask'].to(device),
+                output_hidden_states=True,
+            )
+            # hidden_states[0] is the embeddings, hidden_states[-1] feeds the real classifier
+            features.append(torch.stack([state[:, 0] for state in outputs.hidden_states[1:-1]]).cpu())
+            labels.append(batch['labels'])
+    return torch.cat(features, dim=1), torch.cat(labels)
+
+def train_exit_heads(model, train_dataset, val_dataset=None, output_dir='./medical_ai_model_enhanced',
+                     epochs=20, learning_rate=1e-3, batch_size=64):
+    """
+    Train the early-exit heads on the frozen fine-tuned model and save them
+    next to the weights; returns validation accuracy per exit layer
+    """
+    num_exits = model.config.n_layers - 1
+    if num_exits < 1:
+        print("⚠️ Model has a single layer - nothing to exit early from")
+        return {}
+    heads = ExitHeads(model.config.dim, model.config.num_labels, num_exits)
+
+    print(f"🚪 Training early-exit heads for {num_exits} intermediate layers...")
+    train_features, train_labels = _cls_features(model, train_dataset)
+
+    optimizer = torch.optim.AdamW(heads.parameters(), lr=learning_rate)
+    heads.train()
+    for _ in range(epochs):
+        for indices in torch.randperm(len(train_labels)).split(batch_size):
+            loss = sum(
+                torch.nn.functional.cross_entropy(head(train_features[exit_index, indices]), train_labels[indices])
+                for exit_index, head in enumerate(heads.heads)
+            )
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+    heads.eval()
+
+    accuracies = {}
+    if val_dataset is not None:
+        val_features, val_labels = _cls_features(model, val_dataset)
+        with torch.no_grad():
+            for exit_index, head in enumerate(heads.heads):
+                predictions = head(val_features[exit_index]).argmax(dim=-1)
+                accuracies[exit_index + 1] = float((predictions == val_labels).float().mean())
+                print(f"📊 Exit after layer {exit_index + 1}: validation accuracy {accuracies[exit_index + 1]:.3f}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, EXIT_HEADS_FILENAME)
+    torch.save({
+        'dim': model.config.dim,
+        'num_labels': model.config.num_labels,
+        'num_exits': num_exits,
+        'state_dict': heads.state_dict(),
+    }, output_path)
+    print(f"💾 Early-exit heads saved to {output_path}")
+    return accuracies
+
+def early_exit_forward(model, heads, input_ids, attention_mask, threshold):
+    """
+    Run the transformer layer by layer; rows whose exit head is at least
+    `threshold` confident stop there. Returns logits and the number of
+    layers each row executed
+    """
+    distilbert = model.distilbert
+    hidden_states = distilbert.embeddings(input_ids)
+    layers = distilbert.transformer.layer
+
+    logits = torch.empty(input_ids.shape[0], model.config.num_labels, device=hidden_states.device)
+    layers_used = torch.full((input_ids.shape[0],), len(layers), dtype=torch.long)
+    active = torch.arange(input_ids.shape[0], device=hidden_states.device)
+
+    for layer_index, layer in enumerate(layers):
+        mask = _attention_mask(model, hidden_states, attention_mask)
+        hidden_states = _run_layer(layer, hidden_states, mask)
+        cls_state = hidden_states[:, 0]
+
+        if layer_index == len(layers) - 1:
+            logits[active] = _final_logits(model, cls_state)
+            break
+
+        exit_logits = heads.heads[layer_index](cls_state)
+        confident = torch.softmax(exit_logits, dim=-1).max(dim=-1).values >= threshold
+        if confident.any():
+            logits[active[confident]] = exit_logits[confident]
+            layers_used[active[confident].cpu()] = layer_index + 1
+            keep = ~confident
+            active, hidden_states, attention_mask = active[keep], hidden_states[keep], attention_mask[keep]
+            if active.numel() == 0:
+                break
+
+    return logits, layers_used
@@ -0,0 +1,18 @@
+# gunicorn.conf.py
+"""
+Copy-on-write model sharing across workers:
+
+    MEDIQUEUE_PRELOAD_MODEL=1 gunicorn -k eventlet -w 4 --preload app:app
+
+app.py monkey-patches eventlet before its imports and loads the weights
+(memory-mapped, see MEDIQUEUE_MMAP_WEIGHTS) in the master; after the fork
+each worker adopts them and starts its own batcher and warm-up here.
+"""
+import os
+
+def post_worker_init(worker):
+    if os.environ.get('MEDIQUEUE_PRELOAD_MODEL', '0') != '1':
+        return
+
+    from app import socketio, load_ai_model
+    socketio.start_background_task(load_ai_model)
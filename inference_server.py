@@ -0,0 +1,163 @@
+# inference_server.py
+"""
+Standalone inference daemon that owns the DistilBERT model so several web
+workers can share one copy of the weights.
+
+Protocol: newline-delimited JSON over a Unix socket or localhost TCP.
+Each request line is {"op": "recommend", "symptoms": "..."} (or
+"similar", "ping", "stats", "reload", "model_status") and gets exactly one JSON line back.
+
+    python inference_server.py --socket /tmp/mediqueue-inference.sock
+    MEDIQUEUE_INFERENCE_SERVER=unix:/tmp/mediqueue-inference.sock gunicorn ...
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+from typing import Dict, Any
+
+DEFAULT_SOCKET_PATH = '/tmp/mediqueue-inference.sock'
+DEFAULT_TIMEOUT = float(os.environ.get('MEDIQUEUE_INFERENCE_TIMEOUT', 2.0))
+
+def parse_address(value):
+    """
+    'unix:/path.sock' or '/path.sock' -> (AF_UNIX, path)
+    'host:port' -> (AF_INET, (host, port))
+    """
+    if value.startswith('unix:'):
+        return socket.AF_UNIX, value[len('unix:'):]
+    if value.startswith('/') or value.startswith('.'):
+        return socket.AF_UNIX, value
+    host, _, port = value.rpartition(':')
+    return socket.AF_INET, (host or '127.0.0.1', int(port))
+
+class InferenceClient:
+    """Talks to the inference daemon; every call is bounded by a socket timeout"""
+    def __init__(self, address, timeout=DEFAULT_TIMEOUT):
+        self.family, self.address = parse_address(address)
+        self.timeout = timeout
+
+    def _call(self, payload: Dict[str, Any], timeout=None) -> Dict[str, Any]:
+        sock = socket.socket(self.family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout if timeout is None else timeout)
+        try:
+            sock.connect(self.address)
+            sock.sendall((json.dumps(payload) + '\n').encode('utf-8'))
+
+            with sock.makefile('r', encoding='utf-8') as reader:
+                line = reader.readline()
+        finally:
+            sock.close()
+
+        if not line:
+            raise ConnectionError('inference server closed the connection')
+
+        response = json.loads(line)
+        if 'error' in response:
+            raise RuntimeError(f"inference server error: {response['error']}")
+        return response
+
+    def ping(self, timeout=None) -> Dict[str, Any]:
+        return self._call({'op': 'ping'}, timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return self._call({'op': 'stats'})
+
+    def ai_recommend(self, symptoms: str) -> Dict[str, Any]:
+        """Same result dict as model_predictor_enhanced.ai_recommend"""
+        return self._call({'op': 'recommend', 'symptoms': symptoms})['result']
+
+    def similar_cases(self, symptoms: str, top_k=5):
+        return self._call({'op': 'similar', 'symptoms': symptoms, 'top_k': top_k})['result']
+
+    def reload(self, model_path=None) -> Dict[str, Any]:
+        """Start a hot model swap in the daemon (see model_registry.py); ValueError for a disallowed path"""
+        response = self._call({'op': 'reload', 'model_path': model_path})
+        if response.get('invalid'):
+            raise ValueError(response['invalid'])
+        return response
+
+    def model_status(self) -> Dict[str, Any]:
+        return self._call({'op': 'model_status'})['result']
+
+class InferenceRequestHandler(socketserver.StreamRequestHandler):
+    """Serves JSON lines on one connection until the client hangs up"""
+    def handle(self):
+        import model_predictor_enhanced
+
+        for raw_line in self.rfile:
+            try:
+                request = json.loads(raw_line.decode('utf-8'))
+                op = request.get('op', 'recommend')
+
+                if op == 'recommend':
+                    # Goes through the shared micro-batcher, so requests from all
+                    # web workers are batched together
+                    response = {'result': model_predictor_enhanced.ai_recommend(str(request['symptoms']))}
+                elif op == 'similar':
+                    response = {'result': model_predictor_enhanced.similar_cases(str(request['symptoms']), int(request.get('top_k', 5)))}
+                elif op == 'ping':
+                    predictor = model_predictor_enhanced.enhanced_predictor
+                    response = {'status': 'ready', 'model_version': predictor.model_version, 'backend': predictor.backend}
+                elif op == 'stats':
+                    response = model_predictor_enhanced.ai_stats()
+                elif op == 'reload':
+                    from model_registry import registry
+                    try:
+                        response = {'started': registry.start_swap(request.get('model_path')), 'result': registry.get_stats()}
+                    except ValueError as e:
+                        response = {'started': False, 'invalid': str(e)}
+                elif op == 'model_status':
+                    from model_registry import registry
+                    response = {'result': registry.get_stats()}
+                else:
+                    response = {'error': f'unknown op {op!r}'}
+            except Exception as e:
+                response = {'error': str(e)}
+
+            self.wfile.write((json.dumps(response) + '\n').encode('utf-8'))
+            self.wfile.flush()
+
+class ThreadingUnixInferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+class ThreadingTCPInferenceServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+def serve(address):
+    """Load and warm the model, then serve until interrupted"""
+    import model_predictor_enhanced
+
+    predictor = model_predictor_enhanced.load_predictor()
+    predictor.warm_up()
+
+    family, bind_address = parse_address(address)
+    if family == socket.AF_UNIX:
+        if os.path.exists(bind_address):
+            os.unlink(bind_address)
+        server = ThreadingUnixInferenceServer(bind_address, InferenceRequestHandler)
+    else:
+        server = ThreadingTCPInferenceServer(bind_address, InferenceRequestHandler)
+
+    print(f"🧠 Inference server listening on {address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("🛑 Inference server stopping")
+    finally:
+        server.server_close()
+        if family == socket.AF_UNIX and os.path.exists(bind_address):
+            os.unlink(bind_address)
+
+def main():
+    parser = argparse.ArgumentParser(description='Shared MediQueue+ AI inference server')
+    parser.add_argument('--socket', default=None, help=f'Unix socket path (default {DEFAULT_SOCKET_PATH})')
+    parser.add_argument('--listen', default=None, help='host:port to listen on instead of a Unix socket')
+    args = parser.parse_args()
+
+    serve(args.listen or f"unix:{args.socket or DEFAULT_SOCKET_PATH}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# label_manifest.py
+"""
+label_manifest.json, written by training next to the weights, says what the
+model's output ids mean: the ordered label list, which labels are
+emergencies, the training max_length, and fingerprints of the tokenizer
+vocabulary and the text normalizer it was trained with. The predictor loads
+it at startup and refuses weights it does not match.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+LABEL_MANIFEST_FILENAME = 'label_manifest.json'
+MANIFEST_FORMAT = 1
+
+# Conditions flagged as emergencies in predictions (training default)
+EMERGENCY_CONDITIONS = ['Heart Attack', 'Stroke', 'COVID-19']
+
+# Label order of models trained before the manifest existed, used only when
+# config.json has no real label names
+LEGACY_DISEASE_LABELS = [
+    'Psoriasis', 'Varicose Veins', 'Asthma', 'Chronic Kidney Disease',
+    'Migraine', 'Gastritis', 'Anemia', 'Osteoarthritis', 'Chickenpox',
+    'Diabetes', 'Hypertension', 'Flu', 'COVID-19', 'Tuberculosis',
+    'Allergy', 'Depression', 'Heart Attack', 'Stroke', 'Kidney Stones',
+    'General Physician'
+]
+
+# Inputs exercising abbreviation expansion, punctuation and whitespace
+# handling; training and serving must normalize them identically
+NORMALIZER_PROBES = [
+    "C/O chest pain, SOB & high temp!!",
+    "HR 120, BP 150/90 with n/v",
+    "  Headache (HA) for 3 days; CP?  ",
+]
+
+def _sha256(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def normalizer_fingerprint(normalize) -> str:
+    """Hash of what the text cleaning function does to the probe inputs"""
+    return _sha256('\n'.join(normalize(probe) for probe in NORMALIZER_PROBES))[:16]
+
+def tokenizer_fingerprint(tokenizer) -> Dict[str, Any]:
+    """Vocabulary hash (same for the slow and fast tokenizer classes) plus casing"""
+    vocab = tokenizer.get_vocab()
+    return {
+        'vocab_size': len(vocab),
+        'vocab_sha256': _sha256('\n'.join(sorted(vocab, key=vocab.get))),
+        'do_lower_case': bool(getattr(tokenizer, 'do_lower_case', True)),
+    }
+
+def _checksum(payload):
+    return _sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False))
+
+class LabelManifest:
+    """Label map and preprocessing fingerprints for one set of weights"""
+    def __init__(self, labels: List[str], emergency_conditions: List[str], max_length: int,
+                 tokenizer: Dict[str, Any], normalizer: str, created_at=None):
+        self.labels = list(labels)
+        self.emergency_conditions = list(emergency_conditions)
+        self.max_length = int(max_length)
+        self.tokenizer = tokenizer
+        self.normalizer = normalizer
+        self.created_at = created_at or datetime.now().isoformat(timespec='seconds')
+
+    @classmethod
+    def build(cls, labels, tokenizer, normalize, emergency_conditions=EMERGENCY_CONDITIONS, max_length=256):
+        """Manifest for a training run; emergencies the model cannot predict are dropped"""
+        return cls(labels, [label for label in emergency_conditions if label in labels], max_length,
+                   tokenizer_fingerprint(tokenizer), normalizer_fingerprint(normalize))
+
+    def _payload(self) -> Dict[str, Any]:
+        return {
+            'format': MANIFEST_FORMAT,
+            'labels': self.labels,
+            'emergency_conditions': self.emergency_conditions,
+            'max_length': self.max_length,
+            'tokenizer': self.tokenizer,
+            'normalizer': self.normalizer,
+            'created_at': self.created_at,
+        }
+
+    def save(self, output_dir) -> str:
+        payload = self._payload()
+        payload['checksum'] = _checksum(payload)
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, LABEL_MANIFEST_FILENAME)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2, ensure_ascii=False)
+        print(f"🏷️ Label manifest saved to {path} ({len(self.labels)} labels)")
+        return path
+
+    @classmethod
+    def load(cls, model_path) -> Optional['LabelManifest']:
+        """Read and checksum the manifest; None when the model has none (raises ValueError when corrupt)"""
+        path = os.path.join(model_path, LABEL_MANIFEST_FILENAME)
+        if not os.path.exists(path):
+            return None
+
+        with open(path, encoding='utf-8') as f:
+            payload = json.load(f)
+        checksum = payload.pop('checksum', None)
+        if checksum != _checksum(payload):
+            raise ValueError(f"{path} checksum mismatch - the file was edited or corrupted")
+        if payload.get('format') != MANIFEST_FORMAT:
+            raise ValueError(f"{path} has format {payload.get('format')}, expected {MANIFEST_FORMAT}")
+
+        manifest = cls(payload['labels'], payload['emergency_conditions'], payload['max_length'],
+                       payload['tokenizer'], payload['normalizer'], payload['created_at'])
+        if len(set(manifest.labels)) != len(manifest.labels):
+            raise ValueError(f"{path} lists a label twice")
+        if set(manifest.emergency_conditions) - set(manifest.labels):
+            raise ValueError(f"{path} has emergency conditions that are not labels")
+        return manifest
+
+    def verify(self, config, tokenizer, normalize):
+        """
+        Check the manifest against the loaded weights and preprocessing:
+        raises ValueError on anything that would misread the model's outputs
+        """
+        if config.num_labels != len(self.labels):
+            raise ValueError(f"model has {config.num_labels} outputs but the manifest lists {len(self.labels)} labels")
+
+        config_labels = [config.id2label[i] for i in range(config.num_labels)]
+        if not _generic_labels(config_labels) and config_labels != self.labels:
+            raise ValueError("config.json id2label disagrees with the manifest label order")
+
+        if tokenizer_fingerprint(tokenizer) != self.tokenizer:
+            raise ValueError("tokenizer vocabulary differs from the one the model was trained with")
+
+        if normalizer_fingerprint(normalize) != self.normalizer:
+            # Still the right labels, but inputs are cleaned differently than in training
+            print("⚠️ Text normalizer differs from training - predictions may degrade")
+
+def _generic_labels(labels):
+    return all(label == f"LABEL_{i}" for i, label in enumerate(labels))
+
+def labels_from_config(config) -> List[str]:
+    """Label order for models without a manifest: config.json names, else the legacy list"""
+    labels = [config.id2label[i] for i in range(config.num_labels)]
+    if _generic_labels(labels):
+        if len(LEGACY_DISEASE_LABELS) != config.num_labels:
+            raise ValueError(f"model has {config.num_labels} unnamed outputs and no {LABEL_MANIFEST_FILENAME}")
+        return list(LEGACY_DISEASE_LABELS)
+    return labels
@@ -0,0 +1,289 @@
+# model_export.py
+import argparse
+import csv
+import gc
+import json
+import os
+import time
+
+import numpy as np
+import torch
+from transformers import DistilBertTokenizerFast, DistilBertForSequenceClassification
+
+DEFAULT_MODEL_PATH = './medical_ai_model_enhanced'
+ONNX_FILENAME = 'model.onnx'
+INT8_FILENAME = 'model_int8.pt'
+DEFAULT_CSV_PATH = 'medical_training_data.csv'
+
+# On-disk artifact each serving backend loads, used for the size column of the report
+BACKEND_ARTIFACTS = {
+    'torch': ['model.safetensors', 'pytorch_model.bin'],
+    'onnx': [ONNX_FILENAME],
+    'int8': [INT8_FILENAME],
+    'torchscript': [],
+}
+
+# Short symptom texts used to check that exported models match the original
+PARITY_TEXTS = [
+    "I have sharp chest pain and sweating",
+    "My skin has red patches and it's itching",
+    "Headache and dizziness for 2 days",
+    "Stomach pain and nausea after eating",
+    "Cough and breathing difficulty",
+    "Joint pain and swelling in knees",
+]
+
+class _LogitsOnly(torch.nn.Module):
+    """Wrap the classifier so exported graphs take tensors and return logits"""
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+def load_eager_model(model_path=DEFAULT_MODEL_PATH):
+    """Load the fine-tuned model with plain attention, which traces cleanly"""
+    model = DistilBertForSequenceClassification.from_pretrained(model_path, attn_implementation='eager')
+    model.eval()
+    return model
+
+def trace_torchscript(model, sequence_length, device='cpu'):
+    """Trace and freeze a logits-only graph for one fixed sequence length"""
+    wrapper = _LogitsOnly(model)
+    wrapper.eval()
+
+    # Include padding so the attention mask path is part of the graph
+    input_ids = torch.ones(2, sequence_length, dtype=torch.long, device=device)
+    attention_mask = torch.ones(2, sequence_length, dtype=torch.long, device=device)
+    attention_mask[1, sequence_length // 2:] = 0
+
+    with torch.no_grad():
+        traced = torch.jit.trace(wrapper, (input_ids, attention_mask))
+    return torch.jit.freeze(traced)
+
+def export_onnx(model_path=DEFAULT_MODEL_PATH, output_path=None, opset=17):
+    """Export the classifier to ONNX with dynamic batch and sequence axes"""
+    output_path = output_path or os.path.join(model_path, ONNX_FILENAME)
+    print(f"📦 Exporting {model_path} to ONNX at {output_path}...")
+
+    model = _LogitsOnly(load_eager_model(model_path))
+
+    # Include padding in the dummy batch so the attention mask path is traced
+    input_ids = torch.ones(2, 8, dtype=torch.long)
+    attention_mask = torch.ones(2, 8, dtype=torch.long)
+    attention_mask[1, 5:] = 0
+
+    torch.onnx.export(
+        model,
+        (input_ids, attention_mask),
+        output_path,
+        input_names=['input_ids', 'attention_mask'],
+        output_names=['logits'],
+        dynamic_axes={
+            'input_ids': {0: 'batch', 1: 'sequence'},
+            'attention_mask': {0: 'batch', 1: 'sequence'},
+            'logits': {0: 'batch'},
+        },
+        opset_version=opset,
+        dynamo=False,
+    )
+
+    max_diff = check_onnx_parity(model_path, output_path)
+    print(f"✅ ONNX export complete (max logit difference vs PyTorch: {max_diff:.2e})")
+    return output_path
+
+def check_onnx_parity(model_path=DEFAULT_MODEL_PATH, onnx_path=None, texts=PARITY_TEXTS):
+    """Return the largest absolute logit difference between PyTorch and ONNX Runtime"""
+    import onnxruntime as ort
+
+    onnx_path = onnx_path or os.path.join(model_path, ONNX_FILENAME)
+    tokenizer = DistilBertTokenizerFast.from_pretrained(model_path)
+    model = DistilBertForSequenceClassification.from_pretrained(model_path)
+    model.eval()
+    session = ort.InferenceSession(onnx_path, providers=['CPUExecutionProvider'])
+
+    inputs = tokenizer(list(texts), truncation=True, padding=True, max_length=256, return_tensors='pt')
+    with torch.no_grad():
+        torch_logits = model(**inputs).logits.numpy()
+    onnx_logits = session.run(['logits'], {
+        'input_ids': inputs['input_ids'].numpy(),
+        'attention_mask': inputs['attention_mask'].numpy(),
+    })[0]
+
+    return float(np.abs(torch_logits - onnx_logits).max())
+
+def export_int8(model_path=DEFAULT_MODEL_PATH, output_path=None):
+    """Quantize the Linear layers to INT8 (dynamic) and save the state dict"""
+    output_path = output_path or os.path.join(model_path, INT8_FILENAME)
+    print(f"📦 Quantizing {model_path} to dynamic INT8 at {output_path}...")
+
+    model = DistilBertForSequenceClassification.from_pretrained(model_path)
+    model.eval()
+    quantized = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    torch.save(quantized.state_dict(), output_path)
+
+    size_mb = os.path.getsize(output_path) / (1024 * 1024)
+    print(f"✅ INT8 model saved ({size_mb:.1f} MB)")
+    return output_path
+
+def current_rss_mb():
+    """Resident set size of this process in MB (Linux only, None elsewhere)"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+def load_labeled_texts(csv_path=DEFAULT_CSV_PATH, limit=None):
+    """Read (symptoms, disease) pairs from the training CSV"""
+    texts, labels = [], []
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            texts.append(row['symptoms'])
+            labels.append(row['disease'])
+            if limit and len(texts) >= limit:
+                break
+    return texts, labels
+
+def _artifact_size_mb(model_path, backend):
+    for name in BACKEND_ARTIFACTS.get(backend, []):
+        path = os.path.join(model_path, name)
+        if os.path.exists(path):
+            return os.path.getsize(path) / (1024 * 1024)
+    return None
+
+def compare_backends(model_path=DEFAULT_MODEL_PATH, backends=('torch', 'int8'), csv_path=DEFAULT_CSV_PATH,
+                     limit=None, latency_samples=200, batch_size=32, output_path=None):
+    """
+    Score the CSV corpus with each backend and report accuracy, agreement
+    with the first backend, latency and memory
+    """
+    from model_predictor_enhanced import MedicalAIPredictor
+
+    texts, labels = load_labeled_texts(csv_path, limit)
+    print(f"📊 Comparing backends {list(backends)} on {len(texts)} samples from {csv_path}")
+
+    report = {'model_path': model_path, 'csv_path': csv_path, 'samples': len(texts), 'backends': {}}
+    reference_predictions = None
+
+    for backend in backends:
+        gc.collect()
+        rss_before = current_rss_mb()
+        predictor = MedicalAIPredictor(model_path, cache_size=0, backend=backend)
+        rss_after = current_rss_mb()
+
+        if predictor.backend != backend:
+            print(f"⚠️ Skipping {backend}: artifact not available")
+            continue
+
+        # Single-request latency, as seen by one /recommend call
+        latencies = []
+        for text in texts[:latency_samples]:
+            started = time.perf_counter()
+            predictor.predict(text, top_k=1)
+            latencies.append((time.perf_counter() - started) * 1000.0)
+
+        # Whole-corpus throughput and accuracy
+        started = time.perf_counter()
+        batch_predictions = predictor.predict_batch(texts, top_k=1, batch_size=batch_size)
+        batch_seconds = time.perf_counter() - started
+        predicted = [predictions[0]['condition'] if predictions else None for predictions in batch_predictions]
+
+        if reference_predictions is None:
+            reference_predictions = predicted
+
+        report['backends'][backend] = {
+            'accuracy': float(np.mean([p == l for p, l in zip(predicted, labels)])),
+            'agreement_with_reference': float(np.mean([p == r for p, r in zip(predicted, reference_predictions)])),
+            'latency_p50_ms': float(np.percentile(latencies, 50)) if latencies else None,
+            'latency_p95_ms': float(np.percentile(latencies, 95)) if latencies else None,
+            'batch_items_per_second': len(texts) / batch_seconds if batch_seconds else None,
+            'model_rss_mb': rss_after - rss_before if rss_before is not None and rss_after is not None else None,
+            'artifact_size_mb': _artifact_size_mb(model_path, backend),
+        }
+
+        del predictor
+
+    reference = backends[0]
+    print(f"\n{'backend':<11} {'accuracy':>9} {'agree':>7} {'p50 ms':>8} {'p95 ms':>8} {'items/s':>9} {'RSS MB':>8} {'file MB':>8}")
+    for backend, row in report['backends'].items():
+        print(f"{backend:<11} {row['accuracy']:>9.3f} {row['agreement_with_reference']:>7.3f} "
+              f"{_fmt(row['latency_p50_ms'])} {_fmt(row['latency_p95_ms'])} {_fmt(row['batch_items_per_second'], 9)} "
+              f"{_fmt(row['model_rss_mb'])} {_fmt(row['artifact_size_mb'])}")
+    print(f"(agreement is measured against the '{reference}' backend)")
+
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {output_path}")
+
+    return report
+
+def _fmt(value, width=8):
+    return f"{value:>{width}.1f}" if value is not None else f"{'n/a':>{width}}"
+
+def check_backend_parity(model_path=DEFAULT_MODEL_PATH, backend='torchscript', csv_path=DEFAULT_CSV_PATH,
+                         limit=None, batch_size=32, tolerance=1e-3):
+    """
+    Compare a backend's logits with eager PyTorch over the CSV corpus;
+    returns True when every logit is within tolerance and top-1 labels agree
+    """
+    from model_predictor_enhanced import MedicalAIPredictor
+
+    texts, _ = load_labeled_texts(csv_path, limit)
+    # Early exit changes answers on purpose; compare full-depth forward passes
+    eager = MedicalAIPredictor(model_path, cache_size=0, backend='torch', early_exit_threshold=2.0)
+    candidate = MedicalAIPredictor(model_path, cache_size=0, backend=backend, early_exit_threshold=2.0)
+    if candidate.backend != backend:
+        print(f"❌ Backend {backend} is not available")
+        return False
+
+    max_diff = 0.0
+    disagreements = 0
+    with torch.no_grad():
+        for start in range(0, len(texts), batch_size):
+            chunk = [eager.clean_medical_text(text) for text in texts[start:start + batch_size]]
+            inputs = eager.tokenizer(chunk, truncation=True, padding=True, max_length=eager.max_length, return_tensors='pt')
+            expected = eager._forward(inputs).cpu()
+            actual = candidate._forward(inputs).cpu().float()
+            max_diff = max(max_diff, float((expected - actual).abs().max()))
+            disagreements += int((expected.argmax(dim=-1) != actual.argmax(dim=-1)).sum())
+
+    passed = max_diff <= tolerance and disagreements == 0
+    print(f"{'✅' if passed else '❌'} {backend} vs eager on {len(texts)} texts: "
+          f"max logit difference {max_diff:.2e} (tolerance {tolerance:.0e}), {disagreements} top-1 disagreements")
+    return passed
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the medical AI model to serving formats')
+    parser.add_argument('command', choices=['onnx', 'int8', 'torchscript', 'compare', 'parity'],
+                        help='Artifact to build, compare serving backends, or check a backend against eager outputs')
+    parser.add_argument('--model-path', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--output', default=None,
+                        help='Artifact path (defaults to inside the model directory) or JSON report path for compare')
+    parser.add_argument('--backends', default='torch,int8', help='Comma-separated backends for compare')
+    parser.add_argument('--csv', default=DEFAULT_CSV_PATH, help='Labeled symptoms CSV for compare')
+    parser.add_argument('--limit', type=int, default=None, help='Only use the first N CSV rows for compare/parity')
+    parser.add_argument('--backend', default='torchscript', help='Backend to check for parity')
+    parser.add_argument('--tolerance', type=float, default=1e-3, help='Maximum allowed logit difference for parity')
+    args = parser.parse_args()
+
+    if args.command == 'onnx':
+        export_onnx(args.model_path, args.output)
+    elif args.command == 'int8':
+        export_int8(args.model_path, args.output)
+    elif args.command == 'torchscript':
+        # Loading the backend compiles any missing bucket graphs into the on-disk cache
+        from model_predictor_enhanced import MedicalAIPredictor
+        MedicalAIPredictor(args.model_path, cache_size=0, backend='torchscript')
+    elif args.command == 'parity':
+        if not check_backend_parity(args.model_path, args.backend, args.csv, args.limit, tolerance=args.tolerance):
+            raise SystemExit(1)
+    elif args.command == 'compare':
+        backends = [backend.strip() for backend in args.backends.split(',') if backend.strip()]
+        compare_backends(args.model_path, backends, args.csv, args.limit, output_path=args.output)
+
+if __name__ == "__main__":
+    main()
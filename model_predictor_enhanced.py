@@ -1,221 +1,597 @@
-<<<<<<< HEAD
 # model_predictor_enhanced.py
 import torch
 import numpy as np
-from transformers import DistilBertTokenizer, DistilBertForSequenceClassification
+from transformers import DistilBertTokenizerFast, DistilBertForSequenceClassification, DistilBertConfig
 import re
-from typing import Dict, Any
+import os
+import csv
+import json
+import copy
+import hashlib
+import queue
+import struct
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, List
+
+from answer_table import AnswerTable
+from cheap_classifier import CheapClassifier
+from early_exit import ExitHeads, early_exit_forward
+from label_manifest import LabelManifest, EMERGENCY_CONDITIONS, labels_from_config
+from similar_cases import SimilarCasesIndex
+
+class RecommendationCache:
+    """Thread-safe LRU cache with TTL for ai_recommend results"""
+    def __init__(self, max_size=2048, ttl_seconds=3600):
+        self.max_size = max(1, int(max_size))
+        self.ttl = float(ttl_seconds)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            stored_at, value = entry
+            if self.ttl > 0 and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.misses += 1
+                self.evictions += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+        
+        # Hand out copies so callers cannot mutate the cached result
+        return copy.deepcopy(value)
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+class InferenceQueueFull(RuntimeError):
+    """Raised when too many inference requests are already waiting"""
+
+def _eventlet_monkey_patched():
+    try:
+        import eventlet.patcher
+    except ImportError:
+        return False
+    return eventlet.patcher.is_monkey_patched('thread')
+
+def _run_off_hub(fn, *args, **kwargs):
+    """Run blocking work on a native thread under eventlet, so the hub keeps serving meanwhile"""
+    if _eventlet_monkey_patched():
+        from eventlet import tpool
+        return tpool.execute(fn, *args, **kwargs)
+    return fn(*args, **kwargs)
+
+class InferenceWorkerPool:
+    """
+    Runs CPU-bound inference on real OS threads with a bounded number of
+    pending calls, so torch never blocks the eventlet hub (Socket.IO emits,
+    dashboard traffic) while a forward pass runs
+    """
+    def __init__(self, workers=1, max_pending=64):
+        self.workers = max(1, int(workers))
+        self.max_pending = max(1, int(max_pending))
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._stats_lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        self.in_flight = 0
+        
+        # Under eventlet, threading is green; tpool gives us native threads
+        # that the hub waits on cooperatively
+        self._tpool = None
+        self._executor = None
+        if _eventlet_monkey_patched():
+            from eventlet import tpool
+            tpool.set_num_threads(self.workers)
+            self._tpool = tpool
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='ai-inference')
+
+    def run(self, fn, *args, **kwargs):
+        """Run fn on a worker thread and return its result (raises InferenceQueueFull when saturated)"""
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self.rejected += 1
+            raise InferenceQueueFull(f"{self.max_pending} inference calls already pending")
+        
+        with self._stats_lock:
+            self.in_flight += 1
+        try:
+            if self._tpool is not None:
+                return self._tpool.execute(fn, *args, **kwargs)
+            return self._executor.submit(fn, *args, **kwargs).result()
+        finally:
+            with self._stats_lock:
+                self.in_flight -= 1
+                self.completed += 1
+            self._slots.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                'mode': 'eventlet-tpool' if self._tpool is not None else 'threads',
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'in_flight': self.in_flight,
+                'completed': self.completed,
+                'rejected': self.rejected,
+            }
+
+# Map model.safetensors read-only instead of copying it onto the heap, so the
+# weights sit in the page cache and are shared by every worker process (CPU only)
+MMAP_WEIGHTS = os.environ.get('MEDIQUEUE_MMAP_WEIGHTS', '1') == '1'
+
+SAFETENSORS_DTYPES = {
+    'F64': torch.float64, 'F32': torch.float32, 'F16': torch.float16, 'BF16': torch.bfloat16,
+    'I64': torch.int64, 'I32': torch.int32, 'I16': torch.int16, 'I8': torch.int8, 'U8': torch.uint8,
+    'BOOL': torch.bool,
+}
+
+def mmap_safetensors(path) -> Dict[str, torch.Tensor]:
+    """
+    Tensors viewing a private, read-only mapping of a .safetensors file;
+    pages are loaded lazily and stay shared as long as nobody writes them
+    """
+    with open(path, 'rb') as f:
+        header_size = struct.unpack('<Q', f.read(8))[0]
+        header = json.loads(f.read(header_size))
+    
+    storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=os.path.getsize(path))
+    data_start = 8 + header_size
+    
+    tensors = {}
+    for name, info in header.items():
+        if name == '__metadata__':
+            continue
+        dtype = SAFETENSORS_DTYPES[info['dtype']]
+        start, _ = info['data_offsets']
+        item_size = torch.empty(0, dtype=dtype).element_size()
+        if (data_start + start) % item_size:
+            raise ValueError(f"{name} is not aligned in {path}")
+        tensors[name] = torch.empty(0, dtype=dtype).set_(storage, (data_start + start) // item_size, info['shape'])
+    return tensors
+
+# Model artifact to serve (e.g. ./medical_ai_model_student for the distilled model)
+MODEL_PATH = os.environ.get('MEDIQUEUE_MODEL_PATH', './medical_ai_model_enhanced')
+
+# Result cache settings (set MEDIQUEUE_CACHE_SIZE=0 to disable)
+CACHE_SIZE = int(os.environ.get('MEDIQUEUE_CACHE_SIZE', 2048))
+CACHE_TTL_SECONDS = float(os.environ.get('MEDIQUEUE_CACHE_TTL', 3600))
+
+# Inference runtime: 'torch' (eager PyTorch), 'onnx' (ONNX Runtime),
+# 'int8' (dynamically quantized PyTorch, CPU only) or 'torchscript'
+# (traced graphs per sequence-length bucket) - see model_export.py
+AI_BACKEND = os.environ.get('MEDIQUEUE_AI_BACKEND', 'torch').lower()
+
+# Cheap-first cascade: answer from the TF-IDF tier when its top confidence is
+# at least this high (set above 1 to always escalate to DistilBERT)
+CASCADE_THRESHOLD = float(os.environ.get('MEDIQUEUE_CASCADE_THRESHOLD', 0.9))
+
+# Early exit: stop after an intermediate layer once its exit head is at least
+# this confident (needs exit_heads.pt from training; set above 1 to disable)
+EARLY_EXIT_THRESHOLD = float(os.environ.get('MEDIQUEUE_EARLY_EXIT_THRESHOLD', 0.95))
+
+# Append phrases that needed DistilBERT to this JSONL file, so the next
+# answer table build (python answer_table.py --phrase-log ...) covers them
+PHRASE_LOG_PATH = os.environ.get('MEDIQUEUE_PHRASE_LOG', '')
+
+# Sequence-length buckets for the TorchScript backend: inputs are padded up
+# to the next bucket so each traced graph always sees the same shape
+TORCHSCRIPT_BUCKETS = (16, 32, 64, 128, 256)
+
+# Where traced graphs are cached across restarts (default: <model>/torchscript;
+# point it at a writable directory when the model directory is read-only)
+TORCHSCRIPT_CACHE_DIR = os.environ.get('MEDIQUEUE_TORCHSCRIPT_CACHE', '')
+
+# Files that identify the served weights (side artifacts like the answer
+# table must not change the fingerprint they are validated against)
+MODEL_VERSION_FILES = (
+    'config.json', 'model.safetensors', 'pytorch_model.bin',
+    'vocab.txt', 'tokenizer.json', 'tokenizer_config.json', 'label_manifest.json',
+)
+
+# Training max_length (label_manifest.json records it; 256 for older models);
+# serving derives a tighter limit from the corpus (override with MEDIQUEUE_MAX_LENGTH)
+TRAINING_MAX_LENGTH = 256
+MAX_LENGTH_OVERRIDE = os.environ.get('MEDIQUEUE_MAX_LENGTH')
+TRAINING_CSV_PATH = os.environ.get('MEDIQUEUE_TRAINING_CSV', 'medical_training_data.csv')
+
+# Representative complaints used for warm-up passes
+WARMUP_TEXTS = [
+    "I have sharp chest pain and sweating",
+    "My skin has red patches and it's itching",
+    "Headache and dizziness for 2 days",
+    "Stomach pain and nausea after eating",
+]
 
 class MedicalAIPredictor:
-    def __init__(self, model_path='./medical_ai_model_enhanced'):
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    def __init__(self, model_path=MODEL_PATH, cache_size=CACHE_SIZE, cache_ttl=CACHE_TTL_SECONDS,
+                 backend=AI_BACKEND, worker_pool: InferenceWorkerPool = None, cascade_threshold=CASCADE_THRESHOLD,
+                 early_exit_threshold=EARLY_EXIT_THRESHOLD, mmap_weights=MMAP_WEIGHTS):
+        self.requested_backend = backend
+        self.mmap_weights = mmap_weights
+        self.worker_pool = worker_pool
+        self.cascade_threshold = cascade_threshold
+        self.early_exit_threshold = early_exit_threshold
+        self._tier_lock = threading.Lock()
+        self._tier_counts = {'table': 0, 'cache': 0, 'cheap': 0, 'transformer': 0}
+        self._phrase_log_lock = threading.Lock()
+        self.cache = RecommendationCache(cache_size, cache_ttl) if cache_size > 0 else None
+        self.load_model(model_path)
+
+    def load_model(self, model_path):
+        """Load (or reload) tokenizer and weights, invalidating cached results"""
         print(f"🚀 Loading enhanced medical AI model from {model_path}...")
+        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         
         try:
-            self.tokenizer = DistilBertTokenizer.from_pretrained(model_path)
-            self.model = DistilBertForSequenceClassification.from_pretrained(model_path)
-            self.model.to(self.device)
-            self.model.eval()
+            # Rust-backed tokenizer; the pure-Python one dominated short-text latency
+            self.tokenizer = DistilBertTokenizerFast.from_pretrained(model_path)
+            self._load_labels(model_path)
+            self.max_length = self._serving_max_length()
+            self.model_version = self._model_version(model_path)
+            self.model = None
+            self.onnx_session = None
+            self.torchscript_modules = None
+            self.backend = self.requested_backend
+            
+            if self.backend == 'onnx':
+                self.onnx_session = self._load_onnx_session(model_path)
+                if self.onnx_session is None:
+                    self.backend = 'torch'
+            
+            if self.backend == 'int8':
+                self.model = self._load_int8_model(model_path)
+                if self.model is None:
+                    self.backend = 'torch'
+            
+            if self.backend == 'torchscript':
+                self.torchscript_modules = self._load_torchscript_modules(model_path)
+                if self.torchscript_modules is None:
+                    self.backend = 'torch'
+            
+            if self.backend not in ('onnx', 'int8', 'torchscript'):
+                self.backend = 'torch'
+                if self.mmap_weights and self.device.type == 'cpu':
+                    self.model = self._load_mmap_model(model_path)
+                if self.model is None:
+                    self.model = DistilBertForSequenceClassification.from_pretrained(model_path)
+                    self.model.to(self.device)
+                self.model.eval()
             
-            # Your exact disease labels from training
-            self.disease_labels = [
-                'Psoriasis', 'Varicose Veins', 'Asthma', 'Chronic Kidney Disease', 
-                'Migraine', 'Gastritis', 'Anemia', 'Osteoarthritis', 'Chickenpox', 
-                'Diabetes', 'Hypertension', 'Flu', 'COVID-19', 'Tuberculosis', 
-                'Allergy', 'Depression', 'Heart Attack', 'Stroke', 'Kidney Stones', 
-                'General Physician'
-            ]
+            # Early exit runs the eager layers one by one, so it needs a PyTorch model
+            self.exit_heads = None
+            if self.model is not None and self.early_exit_threshold <= 1:
+                self.exit_heads = ExitHeads.load(model_path, self.model, self.device)
+            num_layers = self.model.config.n_layers if self.model is not None else 0
+            with self._tier_lock:
+                self._layer_counts = [0] * (num_layers + 1)
             
-            # Emergency conditions
-            self.emergency_conditions = ['Heart Attack', 'Stroke', 'COVID-19']
+            self.cheap_classifier = CheapClassifier.load(model_path) if self.cascade_threshold <= 1 else None
+            self.similar_cases_index = SimilarCasesIndex.load(model_path)
             
-            print("✅ Enhanced AI model loaded successfully!")
+            self.model_path = model_path
+            self.answer_table = AnswerTable.load(model_path, self.model_version)
+            if self.answer_table is not None:
+                print(f"📒 Answer table loaded ({len(self.answer_table)} known phrasings)")
+            if self.cache is not None:
+                self.cache.clear()
+            
+            print(f"✅ Enhanced AI model loaded successfully! (backend {self.backend}, version {self.model_version}, max_length {self.max_length})")
             
         except Exception as e:
             print(f"❌ Error loading enhanced model: {e}")
             raise
 
-    def clean_medical_text(self, text):
-        """Enhanced medical text preprocessing"""
-        text = str(text).lower().strip()
+    def _load_labels(self, model_path):
+        """
+        Label order, emergency set and training max_length from the model's
+        label manifest (checked against config.json and the tokenizer);
+        models trained before the manifest use config.json id2label
+        """
+        config = DistilBertConfig.from_pretrained(model_path)
+        manifest = LabelManifest.load(model_path)
         
-        # Medical abbreviation expansion (same as your training)
-        medical_abbr = {
-            'hr': 'heart rate', 'bp': 'blood pressure', 'temp': 'temperature',
-            'c/o': 'complains of', 'sob': 'shortness of breath',
-            'cp': 'chest pain', 'ha': 'headache', 'n/v': 'nausea vomiting'
-        }
+        if manifest is not None:
+            manifest.verify(config, self.tokenizer, self.clean_medical_text)
+            self.disease_labels = manifest.labels
+            self.emergency_conditions = manifest.emergency_conditions
+            self.training_max_length = manifest.max_length
+        else:
+            print(f"⚠️ No label manifest in {model_path} - using config.json labels")
+            self.disease_labels = labels_from_config(config)
+            self.emergency_conditions = [label for label in EMERGENCY_CONDITIONS if label in self.disease_labels]
+            self.training_max_length = TRAINING_MAX_LENGTH
+
+    def _serving_max_length(self, csv_path=TRAINING_CSV_PATH, headroom=2.0, multiple=16, floor=64):
+        """
+        Truncation length for serving: twice the longest training phrase in
+        tokens, rounded up to a multiple of 16 and capped at the training length
+        """
+        if MAX_LENGTH_OVERRIDE:
+            return min(int(MAX_LENGTH_OVERRIDE), self.training_max_length)
         
-        for abbr, full in medical_abbr.items():
-            text = text.replace(abbr, full)
+        try:
+            with open(csv_path, newline='', encoding='utf-8') as f:
+                texts = [self.clean_medical_text(row['symptoms']) for row in csv.DictReader(f)]
+        except (OSError, KeyError) as e:
+            print(f"⚠️ Could not read {csv_path} for length statistics ({e}) - using max_length {self.training_max_length}")
+            return self.training_max_length
         
-        # Clean text
-        text = re.sub(r'[^\w\s]', ' ', text)
-        text = ' '.join(text.split())
+        if not texts:
+            return self.training_max_length
         
-        return text
+        longest = max(len(ids) for ids in self.tokenizer(texts)['input_ids'])
+        target = int(np.ceil(longest * headroom / multiple) * multiple)
+        return max(floor, min(target, self.training_max_length))
 
-    def predict(self, symptoms_text, top_k=3):
-        """Get top-K predictions with confidence scores"""
+    def _load_onnx_session(self, model_path):
+        """Open the exported ONNX graph, or return None so we fall back to PyTorch"""
+        onnx_path = os.path.join(model_path, 'model.onnx')
+        if not os.path.exists(onnx_path):
+            print(f"⚠️ {onnx_path} not found (run: python model_export.py onnx) - using PyTorch backend")
+            return None
+        
         try:
-            processed_text = self.clean_medical_text(symptoms_text)
-            
-            # Tokenize
-            inputs = self.tokenizer(
-                processed_text,
-                truncation=True,
-                padding=True,
-                max_length=256,
-                return_tensors='pt'
-            )
-            
-            inputs = {key: value.to(self.device) for key, value in inputs.items()}
-            
-            # Get predictions
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-            
-            # Get top-K predictions
-            probs, indices = torch.topk(predictions, top_k)
-            
-            results = []
-            for i in range(top_k):
-                disease = self.disease_labels[indices[0][i].item()]
-                confidence = probs[0][i].item()
-                is_emergency = disease in self.emergency_conditions
-                
-                results.append({
-                    'condition': disease,
-                    'confidence': confidence,
-                    'emergency': is_emergency
-                })
-            
-            return results
-            
-        except Exception as e:
-            print(f"❌ Prediction error: {e}")
-            return []
+            import onnxruntime as ort
+        except ImportError:
+            print("⚠️ onnxruntime is not installed - using PyTorch backend")
+            return None
+        
+        return ort.InferenceSession(onnx_path, providers=['CPUExecutionProvider'])
 
-    def ai_recommend(self, symptoms: str) -> Dict[str, Any]:
+    def _load_mmap_model(self, model_path):
+        """
+        Classifier whose parameters are views of the memory-mapped
+        model.safetensors, or None to fall back to from_pretrained
+        """
+        weights_path = os.path.join(model_path, 'model.safetensors')
+        if not os.path.exists(weights_path):
+            return None
+        
         try:
-            print(f"🔍 AI analyzing symptoms: '{symptoms}'")
+            config = DistilBertConfig.from_pretrained(model_path)
+            model = DistilBertForSequenceClassification(config)
+            # assign=True swaps in the mapped tensors instead of copying into the
+            # freshly initialised ones, which are then freed
+            missing, unexpected = model.load_state_dict(mmap_safetensors(weights_path), strict=False, assign=True)
+        except Exception as e:
+            print(f"⚠️ Could not memory-map {weights_path}: {e} - loading it onto the heap")
+            return None
+        
+        if missing or unexpected:
+            print(f"⚠️ {weights_path} keys don't match the model (missing {missing[:3]}, unexpected {unexpected[:3]}) "
+                  f"- loading it with from_pretrained")
+            return None
+        
+        print(f"🗺️ Weights memory-mapped from {weights_path}")
+        return model
 
-            predictions = self.predict(symptoms, top_k=3)
-            
-            if not predictions:
-                return {
-                    'success': False,
-                    'condition': 'General Physician',
-                    'confidence': 0.0,
-                    'message': 'AI model prediction failed'
-                }
-            
-            top_prediction = predictions[0]
-            
-            # Use confidence threshold (adjustable)
-            confidence_threshold = 0.5
-            
-            if top_prediction['confidence'] >= confidence_threshold:
-                print(f"✅ AI Success: {top_prediction['condition']} (Confidence: {top_prediction['confidence']:.2f})")
-                
-                return {
-                    'success': True,
-                    'condition': top_prediction['condition'],
-                    'confidence': round(top_prediction['confidence'], 2),
-                    'emergency': top_prediction['emergency'],
-                    'alternative_suggestions': predictions[1:],  # Other top predictions
-                    'message': 'High confidence AI recommendation'
-                }
-            else:
-                print(f"❌ AI Low confidence: {top_prediction['condition']} (Confidence: {top_prediction['confidence']:.2f})")
+    def _load_int8_model(self, model_path):
+        """Rebuild the INT8 dynamically quantized model from its saved state dict"""
+        int8_path = os.path.join(model_path, 'model_int8.pt')
+        if not os.path.exists(int8_path):
+            print(f"⚠️ {int8_path} not found (run: python model_export.py int8) - using PyTorch backend")
+            return None
+        
+        # Quantized kernels only run on CPU
+        self.device = torch.device('cpu')
+        
+        config = DistilBertConfig.from_pretrained(model_path)
+        model = DistilBertForSequenceClassification(config)
+        model.eval()
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        model.load_state_dict(torch.load(int8_path, map_location='cpu'))
+        return model
+
+    def _load_torchscript_modules(self, model_path):
+        """
+        One frozen TorchScript graph per length bucket, traced on first start
+        and cached on disk under torchscript/<model_version>/ for later restarts.
+        Returns None (so we fall back to PyTorch) when tracing fails; an
+        unwritable cache only costs the tracing on every start
+        """
+        from model_export import trace_torchscript
+        
+        cache_root = TORCHSCRIPT_CACHE_DIR or os.path.join(model_path, 'torchscript')
+        cache_dir = os.path.join(cache_root, self.model_version)
+        lengths = [length for length in TORCHSCRIPT_BUCKETS if length < self.max_length] + [self.max_length]
+        
+        eager_model = None
+        cache_writable = True
+        modules = {}
+        try:
+            for length in lengths:
+                path = os.path.join(cache_dir, f'model_len{length}.pt')
+                if os.path.exists(path):
+                    modules[length] = torch.jit.load(path, map_location=self.device)
+                    continue
                 
-                return {
-                    'success': False,
-                    'condition': top_prediction['condition'],
-                    'confidence': round(top_prediction['confidence'], 2),
-                    'message': 'Low confidence in AI recommendation',
-                    'suggestions': predictions  # Return all suggestions for fallback
-                }
+                if eager_model is None:
+                    print(f"🛠️ Compiling TorchScript graphs into {cache_dir}...")
+                    eager_model = DistilBertForSequenceClassification.from_pretrained(model_path, attn_implementation='eager')
+                    eager_model.to(self.device)
+                    eager_model.eval()
+                modules[length] = trace_torchscript(eager_model, length, self.device)
                 
+                if cache_writable:
+                    try:
+                        # Write then rename so a crashed start never leaves a half-written graph
+                        os.makedirs(cache_dir, exist_ok=True)
+                        torch.jit.save(modules[length], path + '.tmp')
+                        os.replace(path + '.tmp', path)
+                    except OSError as e:
+                        cache_writable = False
+                        print(f"⚠️ Cannot cache TorchScript graphs in {cache_dir} ({e}) - "
+                              f"set MEDIQUEUE_TORCHSCRIPT_CACHE to a writable directory")
         except Exception as e:
-            print(f"❌ AI Model Error: {str(e)}")
-            return {
-                'success': False,
-                'condition': 'General Physician',
-                'confidence': 0.0,
-                'message': f'AI processing error: {str(e)}'
-            }
+            print(f"⚠️ TorchScript backend unavailable ({e}) - falling back to PyTorch")
+            return None
+        
+        return modules
 
-# Global instance (same as your original structure)
-enhanced_predictor = MedicalAIPredictor()
+    def _model_version(self, model_path):
+        """Fingerprint the weight files so cache keys and answer tables change with them"""
+        fingerprint = hashlib.sha1()
+        
+        found = False
+        for name in MODEL_VERSION_FILES:
+            file_path = os.path.join(model_path, name)
+            if os.path.isfile(file_path):
+                stat = os.stat(file_path)
+                fingerprint.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8'))
+                found = True
+        
+        # Hub model ids have no local files; fall back to the name
+        if not found:
+            fingerprint.update(str(model_path).encode('utf-8'))
+        
+        return fingerprint.hexdigest()[:12]
 
-def ai_recommend(symptoms: str) -> Dict[str, Any]:
-    """
-    Main interface function - EXACT same as your original
-    """
-    return enhanced_predictor.ai_recommend(symptoms)
+    def _cache_key(self, symptoms):
+        return (self.model_version, self.clean_medical_text(symptoms))
 
-# Test function (same as your original)
-def test_ai_model():
-    """Test the enhanced AI model with various symptoms"""
-    test_cases = [
-        "I have sharp chest pain and sweating",
-        "My skin has red patches and it's itching", 
-        "Headache and dizziness for 2 days",
-        "Stomach pain and nausea after eating",
-        "Cough and breathing difficulty",
-        "Joint pain and swelling in knees",
-    ]
-    
-    print("🧪 Testing ENHANCED AI Model...")
-    for symptoms in test_cases:
-        result = ai_recommend(symptoms)
-        print(f"\nSymptoms: '{symptoms}'")
-        print(f"AI Recommendation: {result['condition']} (Confidence: {result.get('confidence', 0)})")
-        print(f"Success: {result['success']}")
-        if result.get('alternative_suggestions'):
-            print(f"Alternatives: {[s['condition'] for s in result['alternative_suggestions']]}")
+    def lookup_cached(self, symptoms):
+        """Return a cached ai_recommend result for these symptoms, or None"""
+        if self.cache is None:
+            return None
+        return self.cache.get(self._cache_key(symptoms))
 
-if __name__ == "__main__":
-=======
-# model_predictor_enhanced.py
-import torch
-import numpy as np
-from transformers import DistilBertTokenizer, DistilBertForSequenceClassification
-import re
-from typing import Dict, Any
+    def _count_tier(self, tier, count=1):
+        with self._tier_lock:
+            self._tier_counts[tier] += count
 
-class MedicalAIPredictor:
-    def __init__(self, model_path='./medical_ai_model_enhanced'):
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        print(f"🚀 Loading enhanced medical AI model from {model_path}...")
+    def tier_stats(self) -> Dict[str, Any]:
+        """How many answers each tier (cache, TF-IDF, DistilBERT) produced"""
+        with self._tier_lock:
+            counts = dict(self._tier_counts)
+        total = sum(counts.values())
+        return {
+            'cascade_threshold': self.cascade_threshold,
+            'cheap_tier_loaded': self.cheap_classifier is not None,
+            'counts': counts,
+            'hit_rates': {tier: count / total if total else 0.0 for tier, count in counts.items()},
+        }
+
+    def layer_stats(self) -> Dict[str, Any]:
+        """Average transformer layers executed per text and where early exits happened"""
+        with self._tier_lock:
+            counts = list(self._layer_counts)
+        total = sum(counts)
+        return {
+            'early_exit_threshold': self.early_exit_threshold,
+            'exit_heads_loaded': self.exit_heads is not None,
+            'num_layers': len(counts) - 1,
+            'texts': total,
+            'avg_layers_executed': sum(layer * count for layer, count in enumerate(counts)) / total if total else 0.0,
+            'exits_per_layer': {layer: count for layer, count in enumerate(counts) if count},
+        }
+
+    def _answer_many_without_model(self, symptoms_list):
+        """
+        Try the cheap tiers in order (precomputed answer table, result cache,
+        then the TF-IDF classifier when it is confident); None entries must be
+        escalated to DistilBERT
+        """
+        results = [self._lookup_answer_table(symptoms) for symptoms in symptoms_list]
+        self._count_tier('table', sum(result is not None for result in results))
+        
+        for i, symptoms in enumerate(symptoms_list):
+            if results[i] is None:
+                results[i] = self.lookup_cached(symptoms)
+                if results[i] is not None:
+                    self._count_tier('cache')
+        
+        pending = [i for i, result in enumerate(results) if result is None]
+        if self.cheap_classifier is None or not pending:
+            return results
         
         try:
-            self.tokenizer = DistilBertTokenizer.from_pretrained(model_path)
-            self.model = DistilBertForSequenceClassification.from_pretrained(model_path)
-            self.model.to(self.device)
-            self.model.eval()
-            
-            # Your exact disease labels from training
-            self.disease_labels = [
-                'Psoriasis', 'Varicose Veins', 'Asthma', 'Chronic Kidney Disease', 
-                'Migraine', 'Gastritis', 'Anemia', 'Osteoarthritis', 'Chickenpox', 
-                'Diabetes', 'Hypertension', 'Flu', 'COVID-19', 'Tuberculosis', 
-                'Allergy', 'Depression', 'Heart Attack', 'Stroke', 'Kidney Stones', 
-                'General Physician'
-            ]
-            
-            # Emergency conditions
-            self.emergency_conditions = ['Heart Attack', 'Stroke', 'COVID-19']
-            
-            print("✅ Enhanced AI model loaded successfully!")
-            
+            cheap_predictions = self.cheap_classifier.predict(
+                [self.clean_medical_text(symptoms_list[i]) for i in pending], top_k=3
+            )
         except Exception as e:
-            print(f"❌ Error loading enhanced model: {e}")
-            raise
+            print(f"⚠️ First-stage classifier error: {e} - escalating to DistilBERT")
+            return results
+        
+        for i, predictions in zip(pending, cheap_predictions):
+            if predictions[0]['confidence'] < self.cascade_threshold:
+                continue
+            for prediction in predictions:
+                prediction['emergency'] = prediction['condition'] in self.emergency_conditions
+            results[i] = self._build_recommendation(predictions)
+            results[i]['tier'] = 'cheap'
+            self._count_tier('cheap')
+        
+        return results
+
+    def _lookup_answer_table(self, symptoms):
+        if self.answer_table is None:
+            return None
+        predictions = self.answer_table.lookup(self.clean_medical_text(symptoms))
+        if predictions is None:
+            return None
+        for prediction in predictions:
+            prediction['emergency'] = prediction['condition'] in self.emergency_conditions
+        result = self._build_recommendation(predictions)
+        result['tier'] = 'table'
+        return result
+
+    def _log_escalated(self, symptoms_list):
+        """Record phrases that needed DistilBERT for the next answer table build"""
+        if not PHRASE_LOG_PATH or not symptoms_list:
+            return
+        try:
+            with self._phrase_log_lock, open(PHRASE_LOG_PATH, 'a', encoding='utf-8') as f:
+                for symptoms in symptoms_list:
+                    f.write(json.dumps({'symptoms': symptoms}) + '\n')
+        except OSError as e:
+            print(f"⚠️ Could not write phrase log: {e}")
+
+    def store_cached(self, symptoms, result):
+        if self.cache is None:
+            return
+        # Only cache real model answers, not transient failures
+        if 'suggestions' not in result and 'alternative_suggestions' not in result:
+            return
+        self.cache.put(self._cache_key(symptoms), result)
 
-    def clean_medical_text(self, text):
+    @staticmethod
+    def clean_medical_text(text):
         """Enhanced medical text preprocessing"""
         text = str(text).lower().strip()
         
@@ -238,31 +614,89 @@ class MedicalAIPredictor:
     def predict(self, symptoms_text, top_k=3):
         """Get top-K predictions with confidence scores"""
         try:
-            processed_text = self.clean_medical_text(symptoms_text)
-            
-            # Tokenize
-            inputs = self.tokenizer(
-                processed_text,
-                truncation=True,
-                padding=True,
-                max_length=256,
-                return_tensors='pt'
-            )
-            
-            inputs = {key: value.to(self.device) for key, value in inputs.items()}
-            
-            # Get predictions
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-            
-            # Get top-K predictions
-            probs, indices = torch.topk(predictions, top_k)
+            return self._infer([symptoms_text], top_k=top_k)[0]
             
+        except Exception as e:
+            print(f"❌ Prediction error: {e}")
+            return []
+
+    def predict_batch(self, symptoms_texts: List[str], top_k=3, batch_size=32) -> List[List[Dict[str, Any]]]:
+        """Get top-K predictions for many texts, running batched forward passes in chunks"""
+        texts = list(symptoms_texts)
+        batch_size = max(1, int(batch_size))
+        
+        # Bucket by length so each chunk pads to a similar size, then restore input order
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        
+        batch_results = [None] * len(texts)
+        for start in range(0, len(order), batch_size):
+            chunk_indices = order[start:start + batch_size]
+            chunk = [texts[i] for i in chunk_indices]
+            try:
+                chunk_results = self._infer(chunk, top_k=top_k)
+            except Exception as e:
+                print(f"❌ Batch prediction error: {e}")
+                chunk_results = [[] for _ in chunk]
+            for i, results in zip(chunk_indices, chunk_results):
+                batch_results[i] = results
+        
+        return batch_results
+
+    def _infer(self, texts, top_k=3):
+        """_predict_texts, on the worker pool when one is configured"""
+        if self.worker_pool is not None:
+            batch_results, layers_used = self.worker_pool.run(self._predict_with_layers, texts, top_k)
+        else:
+            batch_results, layers_used = self._predict_with_layers(texts, top_k)
+        # Counted back on the calling thread: pool threads are native threads
+        # and must not take locks the eventlet hub also takes
+        self._count_layers(layers_used)
+        return batch_results
+
+    def _predict_texts(self, texts, top_k=3):
+        """Run one padded forward pass over several texts (raises on failure)"""
+        batch_results, layers_used = self._predict_with_layers(texts, top_k)
+        self._count_layers(layers_used)
+        return batch_results
+
+    def _count_layers(self, layers_used):
+        if layers_used is None:
+            return
+        with self._tier_lock:
+            for layer, count in enumerate(torch.bincount(layers_used, minlength=len(self._layer_counts)).tolist()):
+                self._layer_counts[layer] += count
+
+    def _predict_with_layers(self, texts, top_k=3):
+        """
+        _predict_texts without touching shared state, so it can run on any
+        thread; also returns the layers each text ran (None without early exit)
+        """
+        processed_texts = [self.clean_medical_text(text) for text in texts]
+        
+        # Tokenize together, padding to the longest text in the batch
+        inputs = self.tokenizer(
+            processed_texts,
+            truncation=True,
+            padding=True,
+            max_length=self.max_length,
+            return_tensors='pt'
+        )
+        
+        # Get predictions
+        with torch.no_grad():
+            logits, layers_used = self._forward_with_layers(inputs)
+            predictions = torch.nn.functional.softmax(logits, dim=-1)
+        
+        # Get top-K predictions
+        probs, indices = torch.topk(predictions, top_k)
+        probs = probs.cpu().tolist()
+        indices = indices.cpu().tolist()
+        
+        batch_results = []
+        for row_probs, row_indices in zip(probs, indices):
             results = []
-            for i in range(top_k):
-                disease = self.disease_labels[indices[0][i].item()]
-                confidence = probs[0][i].item()
+            for confidence, index in zip(row_probs, row_indices):
+                disease = self.disease_labels[index]
                 is_emergency = disease in self.emergency_conditions
                 
                 results.append({
@@ -270,19 +704,107 @@ class MedicalAIPredictor:
                     'confidence': confidence,
                     'emergency': is_emergency
                 })
-            
-            return results
-            
-        except Exception as e:
-            print(f"❌ Prediction error: {e}")
-            return []
+            batch_results.append(results)
+        
+        return batch_results, layers_used
+
+    def _forward(self, inputs):
+        """Run the selected backend on tokenized inputs and return logits"""
+        return self._forward_with_layers(inputs)[0]
+
+    def _forward_with_layers(self, inputs):
+        """Logits plus the transformer layers each row ran (None unless exiting early)"""
+        if self.onnx_session is not None:
+            logits = self.onnx_session.run(['logits'], {
+                'input_ids': inputs['input_ids'].numpy(),
+                'attention_mask': inputs['attention_mask'].numpy(),
+            })[0]
+            return torch.from_numpy(logits), None
+        
+        if self.torchscript_modules is not None:
+            length = inputs['input_ids'].shape[1]
+            bucket = min(bucket for bucket in self.torchscript_modules if bucket >= length)
+            padding = bucket - length
+            input_ids = torch.nn.functional.pad(inputs['input_ids'], (0, padding), value=self.tokenizer.pad_token_id)
+            attention_mask = torch.nn.functional.pad(inputs['attention_mask'], (0, padding), value=0)
+            return self.torchscript_modules[bucket](input_ids.to(self.device), attention_mask.to(self.device)), None
+        
+        inputs = {key: value.to(self.device) for key, value in inputs.items()}
+        if self.exit_heads is None:
+            return self.model(**inputs).logits, None
+        
+        return early_exit_forward(
+            self.model, self.exit_heads, inputs['input_ids'], inputs['attention_mask'], self.early_exit_threshold
+        )
+
+    def warm_up(self, rounds=3, pause=None):
+        """Run a few dummy forward passes so the first patient doesn't pay for lazy init"""
+        print(f"🔥 Warming up AI model ({rounds} rounds)...")
+        started = time.monotonic()
+        
+        for _ in range(rounds):
+            # Single-item and batched shapes, bypassing the result cache
+            self._infer(WARMUP_TEXTS[:1])
+            self._infer(WARMUP_TEXTS)
+            if pause is not None:
+                pause()
+        
+        print(f"✅ AI model warm ({(time.monotonic() - started) * 1000:.0f} ms)")
 
     def ai_recommend(self, symptoms: str) -> Dict[str, Any]:
         try:
             print(f"🔍 AI analyzing symptoms: '{symptoms}'")
 
+            quick_result = self._answer_many_without_model([symptoms])[0]
+            if quick_result is not None:
+                print(f"⚡ Answered without DistilBERT: {quick_result['condition']}")
+                return quick_result
+
             predictions = self.predict(symptoms, top_k=3)
-            
+            result = self._build_recommendation(predictions)
+            self._count_tier('transformer')
+            self._log_escalated([symptoms])
+            self.store_cached(symptoms, result)
+            return result
+                
+        except Exception as e:
+            print(f"❌ AI Model Error: {str(e)}")
+            return {
+                'success': False,
+                'condition': 'General Physician',
+                'confidence': 0.0,
+                'message': f'AI processing error: {str(e)}'
+            }
+
+    def similar_cases(self, symptoms: str, top_k=5) -> List[Dict[str, Any]]:
+        """Known training descriptions most similar to these symptoms (empty if no index)"""
+        if self.similar_cases_index is None:
+            return []
+        try:
+            return self.similar_cases_index.search([self.clean_medical_text(symptoms)], top_k=top_k)[0]
+        except Exception as e:
+            print(f"⚠️ Similar-cases search error: {e}")
+            return []
+
+    def ai_recommend_many(self, symptoms_list: List[str], batch_size=32) -> List[Dict[str, Any]]:
+        """Batch version of ai_recommend, returning one result dict per input"""
+        print(f"🔍 AI analyzing {len(symptoms_list)} symptom descriptions in batches of {batch_size}")
+        
+        results = self._answer_many_without_model(symptoms_list)
+        missing = [i for i, result in enumerate(results) if result is None]
+        
+        batch_predictions = self.predict_batch([symptoms_list[i] for i in missing], top_k=3, batch_size=batch_size)
+        for i, predictions in zip(missing, batch_predictions):
+            results[i] = self._build_recommendation(predictions)
+            self.store_cached(symptoms_list[i], results[i])
+        self._count_tier('transformer', len(missing))
+        self._log_escalated([symptoms_list[i] for i in missing])
+        
+        return results
+
+    def _build_recommendation(self, predictions) -> Dict[str, Any]:
+        """Turn top-K predictions into the ai_recommend result dict"""
+        try:
             if not predictions:
                 return {
                     'success': False,
@@ -327,14 +849,254 @@ class MedicalAIPredictor:
                 'message': f'AI processing error: {str(e)}'
             }
 
-# Global instance (same as your original structure)
-enhanced_predictor = MedicalAIPredictor()
+class MicroBatcher:
+    """
+    Collects concurrent ai_recommend calls for a few milliseconds and
+    runs them through the model as one padded batch
+    """
+    def __init__(self, predictor: MedicalAIPredictor, max_batch_size=16, max_wait_ms=5.0, max_pending=0):
+        self.predictor = predictor
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        
+        self._queue = queue.Queue(maxsize=max(0, int(max_pending)))
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'batches': 0,
+            'max_batch_size_seen': 0,
+            'total_queue_wait': 0.0,
+            'total_inference_time': 0.0,
+            'errors': 0,
+        }
+        self._started_at = time.monotonic()
+        
+        self._worker = threading.Thread(target=self._run, name='ai-microbatcher', daemon=True)
+        self._worker.start()
+
+    def submit(self, symptoms: str) -> Future:
+        """Queue symptoms for the next batch and return a Future for the result"""
+        future = Future()
+        
+        quick_result = self.predictor._answer_many_without_model([symptoms])[0]
+        if quick_result is not None:
+            future.set_result(quick_result)
+            return future
+        
+        try:
+            self._queue.put_nowait((symptoms, future, time.monotonic()))
+        except queue.Full:
+            raise InferenceQueueFull(f"{self._queue.maxsize} recommendations already waiting for a batch")
+        return future
+
+    def ai_recommend(self, symptoms: str, timeout=None) -> Dict[str, Any]:
+        """Blocking drop-in for MedicalAIPredictor.ai_recommend"""
+        print(f"🔍 AI analyzing symptoms: '{symptoms}'")
+        return self.submit(symptoms).result(timeout=timeout)
+
+    def _collect_batch(self):
+        """Wait for a first request, then gather more until full or the window closes"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            self._process(batch)
+
+    def _process(self, batch):
+        # One predictor for the whole batch, even if a hot swap lands meanwhile
+        predictor = self.predictor
+        texts = [symptoms for symptoms, _, _ in batch]
+        started = time.monotonic()
+        queue_wait = sum(started - enqueued for _, _, enqueued in batch)
+        
+        try:
+            batch_predictions = predictor._infer(texts, top_k=3)
+            results = [predictor._build_recommendation(predictions) for predictions in batch_predictions]
+            failed = False
+        except Exception as e:
+            print(f"❌ Batch prediction error: {e}")
+            results = [predictor._build_recommendation([]) for _ in batch]
+            failed = True
+        
+        inference_time = time.monotonic() - started
+        
+        with self._stats_lock:
+            self._stats['requests'] += len(batch)
+            self._stats['batches'] += 1
+            self._stats['max_batch_size_seen'] = max(self._stats['max_batch_size_seen'], len(batch))
+            self._stats['total_queue_wait'] += queue_wait
+            self._stats['total_inference_time'] += inference_time
+            if failed:
+                self._stats['errors'] += 1
+        
+        predictor._count_tier('transformer', len(batch))
+        predictor._log_escalated(texts)
+        for (symptoms, future, _), result in zip(batch, results):
+            predictor.store_cached(symptoms, result)
+            future.set_result(result)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Throughput and latency counters for tuning the batching window"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        
+        requests = stats['requests']
+        batches = stats['batches']
+        uptime = time.monotonic() - self._started_at
+        
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'requests': requests,
+            'batches': batches,
+            'errors': stats['errors'],
+            'pending': self._queue.qsize(),
+            'max_batch_size_seen': stats['max_batch_size_seen'],
+            'avg_batch_size': requests / batches if batches else 0.0,
+            'avg_queue_wait_ms': stats['total_queue_wait'] * 1000.0 / requests if requests else 0.0,
+            'avg_batch_inference_ms': stats['total_inference_time'] * 1000.0 / batches if batches else 0.0,
+            'items_per_second': requests / stats['total_inference_time'] if stats['total_inference_time'] else 0.0,
+            'uptime_seconds': uptime,
+        }
+
+# Micro-batching window (set MEDIQUEUE_BATCH_MAX_SIZE=1 to disable)
+BATCH_MAX_SIZE = int(os.environ.get('MEDIQUEUE_BATCH_MAX_SIZE', 16))
+BATCH_MAX_WAIT_MS = float(os.environ.get('MEDIQUEUE_BATCH_MAX_WAIT_MS', 5))
+
+# Where inference runs: 'pool' (worker threads, off the eventlet hub) or 'inline'
+AI_EXECUTION = os.environ.get('MEDIQUEUE_AI_EXECUTION', 'pool').lower()
+AI_WORKERS = int(os.environ.get('MEDIQUEUE_AI_WORKERS', 1))
+AI_MAX_PENDING = int(os.environ.get('MEDIQUEUE_AI_MAX_PENDING', 64))
+
+# Global instance (same as your original structure), created by load_predictor()
+# so importing this module stays cheap and the app can load it in the background
+enhanced_predictor = None
+batcher = None
+_load_lock = threading.Lock()
+
+# Predictor built in the gunicorn master by preload_model(), adopted by
+# load_predictor() in each forked worker
+_preloaded_predictor = None
+
+def preload_model(model_path=MODEL_PATH, **predictor_kwargs) -> MedicalAIPredictor:
+    """
+    Load the model before the server forks its workers (gunicorn --preload),
+    so the weights are shared copy-on-write instead of loaded per worker.
+    Starts no threads and runs no inference: neither survives fork
+    """
+    global _preloaded_predictor
+    
+    # Keep the Rust tokenizer and OpenMP from starting thread pools the
+    # children would inherit in a broken state
+    os.environ.setdefault('TOKENIZERS_PARALLELISM', 'false')
+    threads = torch.get_num_threads()
+    torch.set_num_threads(1)
+    try:
+        _preloaded_predictor = MedicalAIPredictor(model_path, worker_pool=None, **predictor_kwargs)
+    finally:
+        torch.set_num_threads(threads)
+    return _preloaded_predictor
+
+def load_predictor() -> MedicalAIPredictor:
+    """Create the global predictor (and micro-batcher) once"""
+    global enhanced_predictor, batcher
+    
+    with _load_lock:
+        if enhanced_predictor is None:
+            worker_pool = InferenceWorkerPool(AI_WORKERS, AI_MAX_PENDING) if AI_EXECUTION == 'pool' else None
+            if _preloaded_predictor is not None:
+                # Threads are per process, so pools and batchers start after the fork
+                predictor = _preloaded_predictor
+                predictor.worker_pool = worker_pool
+            else:
+                # Loading weights and tokenizing the CSV for max_length takes
+                # seconds; /ready and the fallback keep answering meanwhile
+                predictor = _run_off_hub(MedicalAIPredictor, worker_pool=worker_pool)
+            if BATCH_MAX_SIZE > 1:
+                batcher = MicroBatcher(predictor, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, max_pending=AI_MAX_PENDING)
+            enhanced_predictor = predictor
+    
+    return enhanced_predictor
+
+def swap_predictor(predictor: MedicalAIPredictor) -> MedicalAIPredictor:
+    """
+    Make predictor the live model (see model_registry.py). Requests already
+    running finish on the previous one, which is returned
+    """
+    global enhanced_predictor, _preloaded_predictor
+    
+    with _load_lock:
+        previous = enhanced_predictor
+        if previous is _preloaded_predictor:
+            _preloaded_predictor = None
+        if previous is not None and predictor.worker_pool is None:
+            predictor.worker_pool = previous.worker_pool
+        if batcher is not None:
+            batcher.predictor = predictor
+        enhanced_predictor = predictor
+    
+    return previous
 
 def ai_recommend(symptoms: str) -> Dict[str, Any]:
     """
     Main interface function - EXACT same as your original
     """
-    return enhanced_predictor.ai_recommend(symptoms)
+    predictor = load_predictor()
+    if batcher is not None:
+        return batcher.ai_recommend(symptoms)
+    return predictor.ai_recommend(symptoms)
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters of the normalized-text result cache"""
+    if enhanced_predictor is None or enhanced_predictor.cache is None:
+        return {'enabled': False}
+    return dict(enhanced_predictor.cache.get_stats(), enabled=True, model_version=enhanced_predictor.model_version)
+
+def similar_cases(symptoms: str, top_k=5) -> List[Dict[str, Any]]:
+    """
+    Known symptom descriptions this complaint resembles, with their diagnosis
+    """
+    return load_predictor().similar_cases(symptoms, top_k=top_k)
+
+def tier_stats() -> Dict[str, Any]:
+    """Share of answers served by each cascade tier"""
+    if enhanced_predictor is None:
+        return {}
+    return enhanced_predictor.tier_stats()
+
+def layer_stats() -> Dict[str, Any]:
+    """Transformer layers executed per text under early exit"""
+    if enhanced_predictor is None:
+        return {}
+    return enhanced_predictor.layer_stats()
+
+def ai_stats() -> Dict[str, Any]:
+    """Cache, cascade tier, early-exit layer and micro-batch counters in one place"""
+    return {
+        'cache': cache_stats(),
+        'tiers': tier_stats(),
+        'layers': layer_stats(),
+        'batcher': batcher.get_stats() if batcher is not None else None,
+    }
+
+def ai_recommend_many(symptoms_list: List[str], batch_size=32) -> List[Dict[str, Any]]:
+    """
+    Bulk interface for re-triaging queues and offline audits
+    """
+    return load_predictor().ai_recommend_many(symptoms_list, batch_size=batch_size)
 
 # Test function (same as your original)
 def test_ai_model():
@@ -358,5 +1120,4 @@ def test_ai_model():
             print(f"Alternatives: {[s['condition'] for s in result['alternative_suggestions']]}")
 
 if __name__ == "__main__":
->>>>>>> abf49b5551b79fde8c416d085b76cdc64b9632af
-    test_ai_model()
\ No newline at end of file
+    test_ai_model()
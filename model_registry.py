@@ -0,0 +1,220 @@
+# model_registry.py
+"""
+Hot model swaps: load a new artifact next to the live model, check it on a
+canary slice of the training data, then point enhanced_predictor (and the
+micro-batcher) at it. Requests already running finish on the old model,
+which is freed once the last of them lets go of it.
+
+Each process swaps its own model; with MEDIQUEUE_INFERENCE_SERVER set the
+web workers forward the reload to the shared inference daemon instead.
+
+Under eventlet the swap is driven by a green thread: loading and the canary
+run on a native thread that touches no shared locks, and the swap itself
+happens back on the hub.
+"""
+import csv
+import gc
+import os
+import threading
+import time
+import weakref
+from datetime import datetime
+from typing import Dict, Any, List, Tuple
+
+import torch
+
+import model_predictor_enhanced
+from model_predictor_enhanced import MedicalAIPredictor, MODEL_PATH, TRAINING_CSV_PATH
+
+# Canary rows (evenly spaced over the training CSV so every class shows up)
+CANARY_SIZE = int(os.environ.get('MEDIQUEUE_CANARY_SIZE', 200))
+# A candidate is rejected below this canary accuracy...
+CANARY_MIN_ACCURACY = float(os.environ.get('MEDIQUEUE_CANARY_MIN_ACCURACY', 0.5))
+# ...or when it is this much less accurate than the live model
+CANARY_MAX_REGRESSION = float(os.environ.get('MEDIQUEUE_CANARY_MAX_REGRESSION', 0.05))
+
+# Directory new models may be loaded from (loading unpickles files, so never
+# from arbitrary paths); unset allows only reloading MEDIQUEUE_MODEL_PATH
+MODELS_ROOT = os.environ.get('MEDIQUEUE_MODELS_ROOT', '')
+
+def resolve_model_path(model_path=None, models_root=MODELS_ROOT) -> str:
+    """model_path if it is an allowed model directory (raises ValueError otherwise)"""
+    if not model_path:
+        return MODEL_PATH
+    resolved = os.path.realpath(model_path)
+    if resolved == os.path.realpath(MODEL_PATH):
+        return model_path
+    if not models_root:
+        raise ValueError('set MEDIQUEUE_MODELS_ROOT to load models other than MEDIQUEUE_MODEL_PATH')
+    root = os.path.realpath(models_root)
+    if os.path.commonpath([root, resolved]) != root or resolved == root:
+        raise ValueError(f"model_path must be a directory inside {models_root}")
+    if not os.path.isdir(resolved):
+        raise ValueError(f"{model_path} is not a model directory")
+    return model_path
+
+def load_canary_set(csv_path=TRAINING_CSV_PATH, size=CANARY_SIZE) -> Tuple[List[str], List[str]]:
+    """Evenly spaced (symptoms, disease) rows from the training CSV"""
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        rows = [(row['symptoms'], row['disease']) for row in csv.DictReader(f)]
+    if size and len(rows) > size:
+        step = len(rows) / size
+        rows = [rows[int(i * step)] for i in range(size)]
+    return [symptoms for symptoms, _ in rows], [disease for _, disease in rows]
+
+def _canary_accuracy(predictor, texts, labels, batch_size=32):
+    """
+    Top-1 accuracy and per-item latency, straight on the predictor (no pool,
+    cache, cascade or stats, so nothing here takes the predictor's locks)
+    """
+    correct = 0
+    started = time.perf_counter()
+    for start in range(0, len(texts), batch_size):
+        chunk = texts[start:start + batch_size]
+        predictions_batch, _ = predictor._predict_with_layers(chunk, top_k=1)
+        for predictions, label in zip(predictions_batch, labels[start:start + batch_size]):
+            correct += predictions[0]['condition'] == label
+    elapsed_ms = (time.perf_counter() - started) * 1000.0
+    return correct / max(1, len(texts)), elapsed_ms / max(1, len(texts))
+
+def _run_native(fn, *args, poll_seconds=0.05):
+    """
+    Run fn on a real OS thread even under eventlet monkey patching, and wait
+    for it cooperatively, so loading weights never blocks the event loop.
+    fn must not take locks the hub uses (they are green locks)
+    """
+    thread_class = threading.Thread
+    try:
+        import eventlet.patcher
+        if eventlet.patcher.is_monkey_patched('thread'):
+            thread_class = eventlet.patcher.original('threading').Thread
+    except ImportError:
+        pass
+
+    outcome = {}
+    def target():
+        try:
+            outcome['result'] = fn(*args)
+        except BaseException as e:
+            outcome['error'] = e
+
+    thread = thread_class(target=target, name='model-swap-load', daemon=True)
+    thread.start()
+    while thread.is_alive():
+        time.sleep(poll_seconds)
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['result']
+
+class ModelRegistry:
+    """Runs at most one background load -> canary -> swap at a time and reports its progress"""
+    def __init__(self, csv_path=TRAINING_CSV_PATH, canary_size=CANARY_SIZE,
+                 min_accuracy=CANARY_MIN_ACCURACY, max_regression=CANARY_MAX_REGRESSION, **predictor_kwargs):
+        self.csv_path = csv_path
+        self.canary_size = canary_size
+        self.min_accuracy = min_accuracy
+        self.max_regression = max_regression
+        self.predictor_kwargs = predictor_kwargs
+        self._lock = threading.Lock()
+        self._busy = False
+        self._previous_model = None
+        self.state = {'status': 'idle', 'model_path': None, 'error': None, 'canary': None,
+                      'started_at': None, 'finished_at': None}
+        self.swaps = 0
+
+    def start_swap(self, model_path=None) -> bool:
+        """
+        Begin swapping to model_path (default: reload MEDIQUEUE_MODEL_PATH);
+        False if a swap is already running, ValueError for a disallowed path
+        """
+        if model_predictor_enhanced.enhanced_predictor is None:
+            raise RuntimeError('no live model to swap out yet')
+        model_path = resolve_model_path(model_path)
+
+        with self._lock:
+            if self._busy:
+                return False
+            self._busy = True
+            self.state = {'status': 'loading', 'model_path': model_path, 'error': None, 'canary': None,
+                          'started_at': datetime.now().isoformat(timespec='seconds'), 'finished_at': None}
+
+        # A green thread under eventlet, so the swap and state updates stay on the hub
+        threading.Thread(target=self._swap, args=(model_path,), name='model-swap', daemon=True).start()
+        return True
+
+    def _load_candidate(self, model_path, live):
+        """Native-thread part: load the new weights and run the canary (which also warms them up)"""
+        kwargs = {'backend': live.requested_backend, 'cascade_threshold': live.cascade_threshold,
+                  'early_exit_threshold': live.early_exit_threshold, 'mmap_weights': live.mmap_weights}
+        kwargs.update(self.predictor_kwargs)
+        candidate = MedicalAIPredictor(model_path, **kwargs)
+        self.state['status'] = 'validating'
+        return candidate, self._validate(candidate, live)
+
+    def _swap(self, model_path):
+        try:
+            print(f"🔄 Hot swap: loading {model_path} next to the live model...")
+            live = model_predictor_enhanced.enhanced_predictor
+            candidate, canary = _run_native(self._load_candidate, model_path, live)
+
+            self.state['canary'] = canary
+            if not canary['passed']:
+                self._finish('rejected', canary['reason'])
+                print(f"🚫 Hot swap rejected: {canary['reason']} - keeping model {live.model_version}")
+                return
+
+            previous = model_predictor_enhanced.swap_predictor(candidate)
+            self.swaps += 1
+            print(f"✅ Hot swap: model {candidate.model_version} is live (was {previous.model_version})")
+
+            # In-flight requests still hold the old predictor; it goes away when they finish
+            self._previous_model = weakref.ref(previous)
+            del previous, live, candidate
+            gc.collect()
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+            self._finish('swapped')
+        except Exception as e:
+            print(f"❌ Hot swap failed: {e} - keeping the live model")
+            self._finish('failed', str(e))
+
+    def _validate(self, candidate, live) -> Dict[str, Any]:
+        texts, labels = load_canary_set(self.csv_path, self.canary_size)
+        if set(labels) - set(candidate.disease_labels):
+            return {'passed': False, 'reason': f"candidate cannot predict {sorted(set(labels) - set(candidate.disease_labels))}"}
+
+        accuracy, latency_ms = _canary_accuracy(candidate, texts, labels)
+        live_accuracy, live_latency_ms = _canary_accuracy(live, texts, labels)
+        report = {
+            'size': len(texts),
+            'accuracy': round(accuracy, 4),
+            'live_accuracy': round(live_accuracy, 4),
+            'latency_ms_per_item': round(latency_ms, 2),
+            'live_latency_ms_per_item': round(live_latency_ms, 2),
+            'passed': True,
+            'reason': None,
+        }
+        if accuracy < self.min_accuracy:
+            report.update(passed=False, reason=f"canary accuracy {accuracy:.3f} below {self.min_accuracy:.3f}")
+        elif accuracy < live_accuracy - self.max_regression:
+            report.update(passed=False, reason=f"canary accuracy {accuracy:.3f} regresses on live {live_accuracy:.3f}")
+        print(f"🐤 Canary on {len(texts)} rows: accuracy {accuracy:.3f} (live {live_accuracy:.3f}), "
+              f"{latency_ms:.2f} ms/item (live {live_latency_ms:.2f})")
+        return report
+
+    def _finish(self, status, error=None):
+        with self._lock:
+            self.state.update(status=status, error=error, finished_at=datetime.now().isoformat(timespec='seconds'))
+            self._busy = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        live = model_predictor_enhanced.enhanced_predictor
+        with self._lock:
+            stats = dict(self.state)
+        stats['swaps'] = self.swaps
+        stats['live_model_path'] = live.model_path if live is not None else None
+        stats['live_model_version'] = live.model_version if live is not None else None
+        stats['previous_model_released'] = self._previous_model is None or self._previous_model() is None
+        return stats
+
+registry = ModelRegistry()
@@ -0,0 +1,115 @@
+# similar_cases.py
+import argparse
+import csv
+import json
+import os
+from typing import Dict, Any, List
+
+import numpy as np
+
+ENCODER_FILENAME = 'similar_cases_encoder.joblib'
+MATRIX_FILENAME = 'similar_cases.npy'
+CASES_FILENAME = 'similar_cases.json'
+
+def build_similar_cases_index(texts, diseases, clean, output_dir='./medical_ai_model_enhanced', dims=128):
+    """
+    Embed every known symptom description with TF-IDF + truncated SVD (LSA),
+    L2-normalize, and save the matrix as a .npy file that serving memory-maps
+    """
+    import joblib
+    from sklearn.decomposition import TruncatedSVD
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.pipeline import make_pipeline
+
+    # One entry per distinct description
+    cases, seen = [], set()
+    for text, disease in zip(texts, diseases):
+        key = clean(text)
+        if key and key not in seen:
+            seen.add(key)
+            cases.append((key, str(text), str(disease)))
+
+    print(f"🧭 Building similar-cases index over {len(cases)} descriptions...")
+    cleaned = [key for key, _, _ in cases]
+
+    vectorizer = TfidfVectorizer(analyzer='word', ngram_range=(1, 2), sublinear_tf=True)
+    tfidf = vectorizer.fit_transform(cleaned)
+    dims = max(1, min(dims, tfidf.shape[1] - 1, len(cleaned) - 1))
+    encoder = make_pipeline(vectorizer, TruncatedSVD(n_components=dims, random_state=42))
+
+    embeddings = encoder.fit_transform(cleaned).astype(np.float32)
+    embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+    os.makedirs(output_dir, exist_ok=True)
+    joblib.dump(encoder, os.path.join(output_dir, ENCODER_FILENAME))
+    np.save(os.path.join(output_dir, MATRIX_FILENAME), embeddings)
+    with open(os.path.join(output_dir, CASES_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump([{'symptoms': text, 'disease': disease} for _, text, disease in cases], f)
+
+    print(f"💾 Similar-cases index saved to {output_dir} ({embeddings.shape[0]} x {embeddings.shape[1]})")
+
+class SimilarCasesIndex:
+    """Memory-mapped embedding matrix with vectorized top-K cosine search"""
+    def __init__(self, encoder, matrix, cases):
+        self.encoder = encoder
+        self.matrix = matrix
+        self.cases = cases
+
+    @classmethod
+    def load(cls, model_path):
+        """Load the index, or return None when it hasn't been built"""
+        paths = [os.path.join(model_path, name) for name in (ENCODER_FILENAME, MATRIX_FILENAME, CASES_FILENAME)]
+        if not all(os.path.exists(path) for path in paths):
+            return None
+
+        try:
+            import joblib
+            encoder = joblib.load(paths[0])
+            # Read-only mmap: pages are shared between processes and loaded lazily
+            matrix = np.load(paths[1], mmap_mode='r')
+            with open(paths[2], encoding='utf-8') as f:
+                cases = json.load(f)
+            return cls(encoder, matrix, cases)
+        except Exception as e:
+            print(f"⚠️ Could not load similar-cases index: {e}")
+            return None
+
+    def search(self, cleaned_texts: List[str], top_k=5) -> List[List[Dict[str, Any]]]:
+        """Top-K most similar known cases for each already-cleaned text"""
+        queries = self.encoder.transform(list(cleaned_texts)).astype(np.float32)
+        queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+        scores = queries @ self.matrix.T
+        top_k = min(top_k, scores.shape[1])
+        candidates = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+
+        results = []
+        for row, indices in zip(scores, candidates):
+            ordered = indices[np.argsort(-row[indices])]
+            results.append([
+                dict(self.cases[i], similarity=round(float(row[i]), 3))
+                for i in ordered
+            ])
+        return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the similar-cases index from the training CSV')
+    parser.add_argument('--csv', default='medical_training_data.csv')
+    parser.add_argument('--model-path', default='./medical_ai_model_enhanced')
+    parser.add_argument('--dims', type=int, default=128)
+    args = parser.parse_args()
+
+    from model_predictor_enhanced import MedicalAIPredictor
+
+    with open(args.csv, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    build_similar_cases_index(
+        [row['symptoms'] for row in rows],
+        [row['disease'] for row in rows],
+        MedicalAIPredictor.clean_medical_text,
+        args.model_path,
+        args.dims,
+    )
+
+if __name__ == "__main__":
+    main()
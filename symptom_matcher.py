@@ -0,0 +1,263 @@
+# symptom_matcher.py
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+
+from typo_index import SymSpellIndex
+
+# Versioned rules file: fallback keyword -> specialty pairs in precedence
+# order (the first keyword found in the complaint wins) and the emergency
+# keywords. Edits are picked up without a restart.
+RULES_PATH = os.environ.get('MEDIQUEUE_RULES_PATH', 'symptom_rules.json')
+RULES_CHECK_SECONDS = float(os.environ.get('MEDIQUEUE_RULES_CHECK_SECONDS', 2))
+
+def _run_off_hub(fn, *args):
+    """Run CPU-bound work on a native thread under eventlet, so the hub keeps serving meanwhile"""
+    try:
+        import eventlet.patcher
+        if eventlet.patcher.is_monkey_patched('thread'):
+            from eventlet import tpool
+            return tpool.execute(fn, *args)
+    except ImportError:
+        pass
+    return fn(*args)
+
+class AhoCorasick:
+    """
+    Multi-pattern substring automaton: one pass over the text finds the
+    lowest-index pattern occurring anywhere in it
+    """
+    def __init__(self, patterns: List[str]):
+        self._goto = [{}]
+        self._fail = [0]
+        self._best = [None]
+
+        for index, pattern in enumerate(patterns):
+            node = 0
+            for char in pattern:
+                if char not in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(None)
+                    self._goto[node][char] = len(self._goto) - 1
+                node = self._goto[node][char]
+            if self._best[node] is None:
+                self._best[node] = index
+
+        # Breadth-first fail links; each node's best also covers patterns
+        # that end as a suffix of it
+        pending = deque(self._goto[0].values())
+        while pending:
+            node = pending.popleft()
+            for char, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._best[child] = self._min(self._best[child], self._best[self._fail[child]])
+                pending.append(child)
+
+    @staticmethod
+    def _min(a, b):
+        if a is None:
+            return b
+        if b is None:
+            return a
+        return min(a, b)
+
+    def first_match(self, text: str) -> Optional[int]:
+        """Index of the earliest-listed pattern that occurs in text, or None"""
+        goto, fail, best = self._goto, self._fail, self._best
+        node = 0
+        found = None
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if best[node] is not None and (found is None or best[node] < found):
+                found = best[node]
+                if found == 0:
+                    break
+        return found
+
+class KeywordMatcher:
+    """
+    Compiled form of an ordered keyword -> specialty table, answering exactly
+    like scanning the table with `keyword in text` and then falling back to
+    words (longer than 4 characters) that are part of a keyword
+    """
+    def __init__(self, keywords: List[Tuple[str, str]], min_word_length=5):
+        self.keywords = list(keywords)
+        self.min_word_length = min_word_length
+        self._automaton = AhoCorasick([keyword for keyword, _ in self.keywords])
+
+        # Every substring of every keyword -> first keyword containing it, so
+        # the partial-word stage is one dict lookup per word
+        self._fragments = {}
+        for index, (keyword, _) in enumerate(self.keywords):
+            for start in range(len(keyword)):
+                for end in range(start + min_word_length, len(keyword) + 1):
+                    self._fragments.setdefault(keyword[start:end], index)
+
+    def match(self, text: str) -> Optional[str]:
+        """Specialty for the complaint, or None when no keyword applies"""
+        text = text.lower()
+
+        index = self._automaton.first_match(text)
+        if index is not None:
+            return self.keywords[index][1]
+
+        for word in text.split():
+            if len(word) >= self.min_word_length:
+                index = self._fragments.get(word)
+                if index is not None:
+                    return self.keywords[index][1]
+        return None
+
+class SymptomRules:
+    """One version of the rules file, compiled; never mutated after creation"""
+    def __init__(self, version, fallback_keywords: List[Tuple[str, str]], critical_symptoms: List[str],
+                 emergency_specialties: List[str], vocabulary=None, known_words=frozenset()):
+        self.version = version
+        self.fallback_keywords = fallback_keywords
+        self.critical_symptoms = critical_symptoms
+        self.emergency_specialties = emergency_specialties
+        self._fallback = KeywordMatcher(fallback_keywords)
+        self._critical = AhoCorasick(critical_symptoms)
+
+        # Misspellings are only corrected toward rule keyword words (ties go to
+        # the more frequent in training); known_words (training and real
+        # dictionary words, see RulesStore) are left as typed
+        vocabulary = vocabulary or {}
+        word_counts = {}
+        for keyword in [keyword for keyword, _ in fallback_keywords] + critical_symptoms:
+            for word in keyword.split():
+                word_counts[word] = vocabulary.get(word, 0) + 1
+        self.typo_index = SymSpellIndex(word_counts, known_words)
+
+    @classmethod
+    def load(cls, path=RULES_PATH, vocabulary=None, known_words=frozenset()):
+        """Parse, validate and compile a rules file (raises ValueError when malformed)"""
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+
+        if not isinstance(data, dict) or 'version' not in data:
+            raise ValueError(f"{path} must be an object with a 'version'")
+
+        fallback_keywords = []
+        for entry in data.get('fallback_keywords', []):
+            if not (isinstance(entry, list) and len(entry) == 2 and all(isinstance(value, str) and value.strip() for value in entry)):
+                raise ValueError(f"bad fallback keyword entry {entry!r} (expected [keyword, specialty])")
+            fallback_keywords.append((entry[0].strip().lower(), entry[1].strip()))
+
+        critical_symptoms = data.get('critical_symptoms', [])
+        if not all(isinstance(keyword, str) and keyword.strip() for keyword in critical_symptoms):
+            raise ValueError("critical_symptoms must be a list of non-empty strings")
+        critical_symptoms = [keyword.strip().lower() for keyword in critical_symptoms]
+
+        emergency_specialties = data.get('emergency_specialties', [])
+        if not all(isinstance(specialty, str) and specialty.strip() for specialty in emergency_specialties):
+            raise ValueError("emergency_specialties must be a list of non-empty strings")
+
+        if not fallback_keywords or not critical_symptoms or not emergency_specialties:
+            raise ValueError(f"{path} needs at least one fallback keyword, critical symptom and emergency specialty")
+
+        return cls(data['version'], fallback_keywords, critical_symptoms, emergency_specialties, vocabulary, known_words)
+
+    def correct(self, text: str) -> str:
+        """
+        Lowercased text with misspelled keyword words fixed, within the typo
+        time budget; for rule matching only, the model sees the original
+        """
+        return self.typo_index.correct(text)
+
+    def fallback_specialty(self, text: str) -> Optional[str]:
+        return self._fallback.match(text)
+
+    def is_critical(self, text: str) -> bool:
+        """Whether the complaint mentions any emergency keyword"""
+        return self._critical.first_match(text.lower()) is not None
+
+    def emergency_route(self, text: str) -> List[str]:
+        """
+        Specialties to send a critical complaint to: the fallback match when
+        it is an emergency specialty, otherwise all emergency specialties
+        plus the fallback match ("severe pain ..." still reaches Kidney Stones)
+        """
+        specialty = self.fallback_specialty(text)
+        if specialty in self.emergency_specialties:
+            return [specialty]
+        if specialty is not None:
+            return list(self.emergency_specialties) + [specialty]
+        return list(self.emergency_specialties)
+
+class RulesStore:
+    """
+    Hands out the current SymptomRules. At most every `check_interval`
+    seconds one caller stats the file and, if it changed, starts a background
+    compile of the new version that swaps the reference when done; requests
+    keep using the rules they already hold and never wait on a reload
+    """
+    def __init__(self, path=RULES_PATH, check_interval=RULES_CHECK_SECONDS, vocabulary=None, dictionary=None):
+        self.path = path
+        self.check_interval = check_interval
+        self.vocabulary = vocabulary
+        # Training and dictionary words do not depend on the rules file, so
+        # the set is built once and shared by every compiled version
+        self.known_words = frozenset(vocabulary or ()).union(dictionary or ())
+        self._stamp = self._file_stamp()
+        self._rules = SymptomRules.load(path, vocabulary, self.known_words)
+        self._next_check = time.monotonic() + check_interval
+        self._reload_lock = threading.Lock()
+        self.reloads = 0
+        self.last_error = None
+        print(f"📜 Symptom rules v{self._rules.version} loaded from {path} "
+              f"({len(self._rules.fallback_keywords)} fallback keywords, {len(self._rules.critical_symptoms)} critical)")
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def current(self) -> SymptomRules:
+        if time.monotonic() >= self._next_check and self._reload_lock.acquire(blocking=False):
+            self._next_check = time.monotonic() + self.check_interval
+            stamp = self._file_stamp()
+            if stamp is None or stamp == self._stamp:
+                self._reload_lock.release()
+            else:
+                # Remember the stamp either way so a broken file is reported once, not every check
+                self._stamp = stamp
+                threading.Thread(target=self._reload, name='rules-reload', daemon=True).start()
+        return self._rules
+
+    def _reload(self):
+        """Compile the changed file off the request path and swap it in (holds the reload lock)"""
+        try:
+            try:
+                rules = _run_off_hub(SymptomRules.load, self.path, self.vocabulary, self.known_words)
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"⚠️ Could not reload {self.path}: {e} - keeping rules v{self._rules.version}")
+                return
+
+            self._rules = rules
+            self.reloads += 1
+            self.last_error = None
+            print(f"🔁 Symptom rules v{rules.version} swapped in from {self.path}")
+        finally:
+            self._reload_lock.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'path': self.path,
+            'version': self._rules.version,
+            'reloads': self.reloads,
+            'last_error': self.last_error,
+            'typos': self._rules.typo_index.get_stats(),
+        }
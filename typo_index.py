@@ -0,0 +1,184 @@
+# typo_index.py
+import csv
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, Any, Optional
+
+TRAINING_CSV_PATH = os.environ.get('MEDIQUEUE_TRAINING_CSV', 'medical_training_data.csv')
+MODEL_PATH = os.environ.get('MEDIQUEUE_MODEL_PATH', './medical_ai_model_enhanced')
+
+# Extra word list (one word per line) of correctly spelled words to leave alone
+DICTIONARY_PATH = os.environ.get('MEDIQUEUE_DICTIONARY', '/usr/share/dict/words')
+
+# Hard cap on time spent correcting one complaint; words after the cap are
+# passed through unchanged
+TYPO_BUDGET_MS = float(os.environ.get('MEDIQUEUE_TYPO_BUDGET_MS', 5))
+
+WORD_PATTERN = re.compile(r'[a-z]+|[^a-z]+')
+
+def load_vocabulary(csv_path=TRAINING_CSV_PATH) -> Counter:
+    """Word counts over the training symptom descriptions (empty if the CSV is missing)"""
+    counts = Counter()
+    try:
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                counts.update(re.findall(r'[a-z]+', row['symptoms'].lower()))
+    except (OSError, KeyError) as e:
+        print(f"⚠️ Could not read {csv_path} for the typo index ({e}) - using rule keywords only")
+    return counts
+
+def load_dictionary(model_path=MODEL_PATH, dictionary_path=DICTIONARY_PATH) -> set:
+    """
+    Real words that must never be "corrected": whole words of the model's
+    tokenizer vocabulary plus the optional word list
+    """
+    words = set()
+    try:
+        vocab_path = os.path.join(model_path, 'vocab.txt')
+        if os.path.exists(vocab_path):
+            with open(vocab_path, encoding='utf-8') as f:
+                words.update(line.strip() for line in f)
+        else:
+            with open(os.path.join(model_path, 'tokenizer.json'), encoding='utf-8') as f:
+                words.update(json.load(f)['model']['vocab'])
+    except (OSError, KeyError, ValueError) as e:
+        print(f"⚠️ Could not read the tokenizer vocabulary in {model_path} ({e})")
+
+    if dictionary_path and os.path.exists(dictionary_path):
+        with open(dictionary_path, encoding='utf-8', errors='ignore') as f:
+            words.update(line.strip().lower() for line in f)
+
+    return {word for word in words if word.isalpha() and word.islower()}
+
+def _stems(word):
+    """Base forms of simple inflections: pains -> pain, racing -> race, spotting -> spot"""
+    for suffix in ('s', 'es', 'ed', 'ing', 'ly'):
+        base = word[:-len(suffix)]
+        if not word.endswith(suffix) or len(base) < 3:
+            continue
+        yield base
+        yield base + 'e'
+        if base[-1] == base[-2]:
+            yield base[:-1]
+        if base.endswith('i'):
+            yield base[:-1] + 'y'
+
+def _deletes(word, max_distance):
+    """Every string reachable from word by deleting up to max_distance characters"""
+    results = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {candidate[:i] + candidate[i + 1:] for candidate in frontier for i in range(len(candidate))}
+        results |= frontier
+    return results
+
+def _edit_distance(a, b, limit):
+    """Optimal string alignment distance (adjacent swaps count once), or limit + 1 when above limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+class SymSpellIndex:
+    """
+    SymSpell-style deletion dictionary: every target word is indexed under
+    its deletions, so correcting a word is a handful of dict lookups plus
+    a few bounded edit-distance checks, independent of vocabulary size.
+    Words in `known_words` (or inflections of them) are never rewritten;
+    pass a frozenset to share one word set between indexes without copying
+    """
+    def __init__(self, word_counts: Dict[str, int], known_words=(), max_distance=2, min_length=4, max_length=20):
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self.max_length = max_length
+        self.counts = {word: count for word, count in word_counts.items() if word.isalpha()}
+        self.known_words = known_words if isinstance(known_words, frozenset) else frozenset(known_words)
+
+        self._deletes = {}
+        for word in self.counts:
+            if len(word) > max_length:
+                continue
+            for deleted in _deletes(word, self._distance_for(word)):
+                self._deletes.setdefault(deleted, []).append(word)
+
+        self._lock = threading.Lock()
+        self.corrections = 0
+        self.budget_exceeded = 0
+
+    def __len__(self):
+        return len(self.counts)
+
+    def _distance_for(self, word):
+        # One edit for short words, two for longer ones
+        return 1 if len(word) <= 6 else self.max_distance
+
+    def _known(self, word):
+        return word in self.counts or word in self.known_words
+
+    def is_known(self, word):
+        return self._known(word) or any(self._known(stem) for stem in _stems(word))
+
+    def lookup(self, word) -> Optional[str]:
+        """Closest target word (fewest edits first), or None for known words and no match"""
+        if not (self.min_length <= len(word) <= self.max_length) or self.is_known(word):
+            return None
+
+        limit = self._distance_for(word)
+        best = None
+        for deleted in _deletes(word, limit):
+            for candidate in self._deletes.get(deleted, ()):
+                distance = _edit_distance(word, candidate, limit)
+                if distance > limit:
+                    continue
+                # Ties go to words keeping the first letter (rarely mistyped), then to frequency
+                key = (distance, candidate[0] != word[0], -self.counts[candidate], candidate)
+                if best is None or key < best:
+                    best = key
+        return best[-1] if best is not None else None
+
+    def correct(self, text: str, budget_ms=TYPO_BUDGET_MS) -> str:
+        """Lowercased text with misspelled words replaced, within budget_ms"""
+        deadline = time.perf_counter() + budget_ms / 1000.0
+        pieces = WORD_PATTERN.findall(text.lower())
+
+        corrected = 0
+        for i, piece in enumerate(pieces):
+            if not piece.isalpha():
+                continue
+            if time.perf_counter() > deadline:
+                with self._lock:
+                    self.budget_exceeded += 1
+                break
+            replacement = self.lookup(piece)
+            if replacement is not None:
+                pieces[i] = replacement
+                corrected += 1
+
+        if corrected:
+            with self._lock:
+                self.corrections += corrected
+        return ''.join(pieces)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'targets': len(self.counts),
+                'known_words': len(self.known_words),
+                'corrections': self.corrections,
+                'budget_exceeded': self.budget_exceeded,
+            }